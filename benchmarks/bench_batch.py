@@ -0,0 +1,65 @@
+"""Batch throughput: the original serial loop against the process pool.
+
+    python benchmarks/bench_batch.py [--items 2000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode
+
+from qr_batch import run_batch
+from qr_payloads import detect_input_type
+from qr_render import RenderOptions
+
+
+def make_items(count):
+    return [f"https://example.com/products/{i}?ref=batch" for i in range(count)]
+
+
+def serial_loop(items, folder):
+    """The loop batch_generate() used to run on the Tk main thread"""
+    for i, item in enumerate(items):
+        data, input_type = detect_input_type(item)
+        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_H)
+        qr.add_data(data)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(os.path.join(folder, f"qr_batch_{i+1:02d}.png"))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="*",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    options = RenderOptions()
+
+    with tempfile.TemporaryDirectory() as folder:
+        baseline = timed(serial_loop, items, folder)
+    print(f"{'serial loop':<14} {len(items) / baseline:>9.1f} items/s")
+
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as folder:
+            elapsed = timed(lambda: list(run_batch(items, options, folder, workers=workers,
+                                                   chunk_size=args.chunk_size)))
+        rate = len(items) / elapsed
+        print(f"{f'pool x{workers}':<14} {rate:>9.1f} items/s  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Render latency with and without the render cache.
+
+Two workloads: "repeated" cycles through a small set of URLs (what operators
+do when regenerating codes), "near-repeated" changes one character per
+request so every lookup misses and only pays for hashing.
+
+    python benchmarks/bench_cache.py [--requests 2000] [--distinct 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_cache import RenderCache
+from qr_render import RenderOptions, render_bytes
+
+
+def latencies(fn, payloads):
+    samples = []
+    for payload in payloads:
+        start = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[int(len(samples) * 0.99)] * 1000
+    print(f"{name:<28} mean {statistics.mean(samples) * 1000:8.3f} ms"
+          f"  p50 {p50:8.3f} ms  p99 {p99:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=50)
+    args = parser.parse_args()
+
+    options = RenderOptions()
+    repeated = [f"https://example.com/page/{i % args.distinct}" for i in range(args.requests)]
+    near = [f"https://example.com/page/{i}" for i in range(args.requests)]
+
+    report("repeated, uncached", latencies(lambda p: render_bytes(p, options), repeated))
+    cache = RenderCache()
+    report("repeated, memory cache", latencies(lambda p: cache.render_bytes(p, options), repeated))
+    print(f"  {cache.stats()}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        warm = RenderCache(directory=folder)
+        for payload in repeated[:args.distinct]:
+            warm.render_bytes(payload, options)
+        cold_memory = RenderCache(directory=folder)
+        report("repeated, disk tier", latencies(lambda p: cold_memory.render_bytes(p, options), repeated))
+
+    report("near-repeated, uncached", latencies(lambda p: render_bytes(p, options), near))
+    cache = RenderCache()
+    report("near-repeated, memory cache", latencies(lambda p: cache.render_bytes(p, options), near))
+    print(f"  {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
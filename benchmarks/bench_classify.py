@@ -0,0 +1,166 @@
+"""Input classification: the original regex chain against the one-pass classifier.
+
+First checks that ``detect_input_type()`` and ``classify_many()`` give the
+original's results for the Debug tab's DOMAIN_TEST_INPUTS and a seeded
+generated corpus. The corpus mixes domains, URLs, emails, phone numbers,
+handles and text, plus near misses of each: odd case, Unicode letters and
+whitespace, stray separators, missing TLDs. Then it times all three over
+``--items`` mixed inputs.
+
+    python benchmarks/bench_classify.py [--items 2000000] [--corpus 200000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_payloads import DOMAIN_TEST_INPUTS, classify_many, detect_input_type
+
+
+def original_detect_input_type(user_input):
+    """detect_input_type() before the one-pass classifier"""
+    user_input = user_input.strip()
+    original_input = user_input
+
+    domain_pattern = r'^[a-zA-Z0-9][a-zA-Z0-9.-]*\.[a-zA-Z]{2,}$'
+    if re.match(domain_pattern, user_input, re.IGNORECASE) and ' ' not in user_input:
+        return f"https://{user_input}", "website"
+
+    if user_input.startswith(('http://', 'https://')):
+        return user_input, "website"
+
+    if user_input.startswith('www.'):
+        return f"https://{user_input}", "website"
+
+    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if re.match(email_pattern, user_input, re.IGNORECASE):
+        return f"mailto:{user_input}", "email"
+
+    phone_pattern = r'^[\+]?[0-9\s\-\(\)]{10,}$'
+    clean_phone = re.sub(r'[\s\-\(\)]', '', user_input)
+    if re.match(phone_pattern, user_input) and len(clean_phone) >= 10:
+        return f"tel:{clean_phone}", "phone"
+
+    if user_input.startswith('@'):
+        handle = user_input[1:]
+        return f"https://instagram.com/{handle}", "social media"
+
+    return original_input, "text"
+
+
+LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Characters that sit on the edges of the patterns: case-folding lookalikes
+# (long s, Kelvin sign, dotless i), Unicode digits and whitespace, separators
+ODD = ["ſ", "K", "ı", "İ", "é", "٣", " ", " ", "\t", "\n", "+", "-", "(", ")", ".",
+       "@", "_", "%", "/", ":", " ", "#", "?", "&", "="]
+
+
+def word(rng, alphabet=LETTERS + "0123456789", low=1, high=12):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def domain(rng):
+    labels = [word(rng, LETTERS + "0123456789-") for _ in range(rng.randint(1, 3))]
+    return ".".join(labels) + "." + word(rng, LETTERS, 1, 6)
+
+
+def phone(rng):
+    parts = [rng.choice(["", "+", "+1 ", "("]), word(rng, "0123456789", 2, 4)]
+    for _ in range(rng.randint(1, 4)):
+        parts.append(rng.choice([" ", "-", ") ", "", " "]))
+        parts.append(word(rng, "0123456789", 1, 4))
+    return "".join(parts)
+
+
+def generators():
+    return [
+        domain,
+        lambda rng: rng.choice(["http://", "https://", "HTTP://", "http:/", "ftp://"]) + domain(rng) + "/" + word(rng),
+        lambda rng: rng.choice(["www.", "WWW.", "www"]) + domain(rng),
+        lambda rng: word(rng, LETTERS + "0123456789._%+-") + "@" + domain(rng),
+        phone,
+        lambda rng: "@" + word(rng, LETTERS + "0123456789._"),
+        lambda rng: " ".join(word(rng) for _ in range(rng.randint(1, 6))),
+    ]
+
+
+def mutate(rng, text):
+    """Insert, replace or drop a character, change case, or pad with whitespace"""
+    choice = rng.randrange(6)
+    position = rng.randint(0, len(text))
+    if choice == 0:
+        return text[:position] + rng.choice(ODD) + text[position:]
+    if choice == 1 and text:
+        return text[:position] + rng.choice(ODD) + text[position + 1:]
+    if choice == 2 and text:
+        return text[:position] + text[position + 1:]
+    if choice == 3:
+        return text.swapcase()
+    if choice == 4:
+        return rng.choice([" ", "\t", "\n", " ", ""]) + text + rng.choice([" ", "\n", " ", ""])
+    return text
+
+
+def corpus(count, seed=18):
+    rng = random.Random(seed)
+    makers = generators()
+    items = list(DOMAIN_TEST_INPUTS) + ["", " ", "@", "www.", "http://", "+", "1" * 9, "1" * 10]
+    while len(items) < count:
+        text = rng.choice(makers)(rng)
+        for _ in range(rng.choice((0, 0, 1, 2, 3))):
+            text = mutate(rng, text)
+        items.append(text)
+    return items
+
+
+def check(items):
+    expected = [original_detect_input_type(item) for item in items]
+    for item, want in zip(items, expected):
+        got = detect_input_type(item)
+        if got != want:
+            raise SystemExit(f"detect_input_type({item!r}) = {got}, expected {want}")
+    if classify_many(items) != expected:
+        raise SystemExit("classify_many() differs from detect_input_type()")
+    counts = {}
+    for _, kind in expected:
+        counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+def rate(fn, items):
+    start = time.perf_counter()
+    fn(items)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000000, help="inputs to time")
+    parser.add_argument("--corpus", type=int, default=200000, help="generated inputs to verify")
+    args = parser.parse_args()
+
+    counts = check(corpus(args.corpus))
+    print(f"{args.corpus} inputs identical to the original: "
+          + ", ".join(f"{kind} {count}" for kind, count in sorted(counts.items())))
+
+    base = corpus(10000, seed=1)
+    items = (base * (args.items // len(base) + 1))[:args.items]
+    runs = [
+        ("original", lambda batch: [original_detect_input_type(item) for item in batch]),
+        ("detect_input_type", lambda batch: [detect_input_type(item) for item in batch]),
+        ("classify_many", classify_many),
+    ]
+    print(f"{args.items} mixed inputs:")
+    baseline = None
+    for name, fn in runs:
+        per_second = rate(fn, items)
+        baseline = baseline or per_second
+        print(f"  {name:<18} {per_second:12,.0f} items/s  ({per_second / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
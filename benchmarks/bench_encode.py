@@ -0,0 +1,98 @@
+"""Memory and throughput of qr_encode against per-item ``QRCode`` objects.
+
+Encodes ``--codes`` distinct version 10 payloads (EC H, what batch_generate()
+used) both ways and keeps every result alive, so tracemalloc reports what
+holding a batch of matrices costs. Before timing, a mixed corpus is checked
+module for module against ``qr_render.build_qr()`` at every level.
+
+    python benchmarks/bench_encode.py [--codes 10000] [--check 300]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qrcode.exceptions import DataOverflowError
+
+import qr_encode
+from qr_render import RenderOptions, build_qr
+
+
+def payloads(count):
+    """Distinct byte-mode payloads that all need version 10 at EC H"""
+    return [f"https://example.com/catalogue/item/{i:08d}?ref=batch&lang=en&utm_source=print"
+            f"&utm_medium=label&sku={i * 7919:012d}" for i in range(count)]
+
+
+def check(count, seed=7):
+    rng = random.Random(seed)
+    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:abcdefghijklmnop?&=é"
+    encoder = qr_encode.Encoder()
+    for i in range(count):
+        data = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, rng.choice((20, 200, 1500)))))
+        options = RenderOptions(error_correction=rng.choice(["L", "M", "Q", "H", "auto"]))
+        try:
+            expected = build_qr(data, options)
+        except (ValueError, DataOverflowError):
+            continue  # too long for the level
+        matrix = encoder.encode(data, options.error_correction, options)
+        if matrix.version != expected.version or matrix.to_list(options.border) != expected.get_matrix():
+            raise SystemExit(f"mismatch for {data!r} at {options.error_correction}")
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codes", type=int, default=10000)
+    parser.add_argument("--check", type=int, default=300, help="random payloads compared with qrcode")
+    args = parser.parse_args()
+
+    check(args.check)
+    print(f"{args.check} random payloads identical to build_qr()")
+
+    items = payloads(args.codes)
+    options = RenderOptions()
+    assert build_qr(items[0], options).version == 10
+
+    # Timing under tracemalloc is slower across the board; throughput is measured separately
+    runs = [
+        ("QRCode objects", lambda: [build_qr(data, options) for data in items]),
+        ("qr_encode", lambda: list(qr_encode.encode_many(items, encoder=qr_encode.Encoder()))),
+    ]
+    if qr_encode.numpy_module() is not None:
+        def pure_python():
+            encoder = qr_encode.Encoder()
+            encoder._np = None
+            return list(qr_encode.encode_many(items, encoder=encoder))
+        runs.append(("qr_encode (no NumPy)", pure_python))
+
+    print(f"{args.codes} version 10 codes, EC H:")
+    for name, build in runs:
+        kept, _, size = measure(build)
+        del kept
+        gc.collect()
+        start = time.perf_counter()
+        kept = build()
+        elapsed = time.perf_counter() - start
+        del kept
+        print(f"  {name:<22} {size / 2 ** 20:8.1f} MB held ({size / args.codes:8.0f} B/code)  "
+              f"{args.codes / elapsed:8.0f} codes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Several sizes and formats of one code: re-rendering each against qr_fanout.
+
+"rerender" is what saving every size took before: a full render per output
+(encode, rasterize, logo, save). "fan-out" encodes once, draws once per size
+and encodes the formats serially (``workers=1``, as batch workers do) or on
+the thread pool.
+
+    python benchmarks/bench_fanout.py [--sizes 350,512,2048] [--formats png,webp,jpeg] [--rounds 10]
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_fanout import box_size_for, parse_variants, render_variants
+from qr_render import RenderOptions, build_qr, render_bytes
+
+DATA = "https://example.com/catalogue/item/00042?ref=print"
+
+
+def rerender(options, variants, modules):
+    for variant in variants:
+        box_size = box_size_for(variant.size, modules, options.border) if variant.size else options.box_size
+        render_bytes(DATA, replace(options, box_size=box_size), variant.format)
+
+
+def best_of(fn, rounds):
+    fn()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="350,512,2048")
+    parser.add_argument("--formats", default="png,webp,jpeg")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    variants = parse_variants(args.sizes, args.formats)
+    options = RenderOptions()
+    modules = build_qr(DATA, options).modules_count
+    runs = [
+        ("rerender", lambda: rerender(options, variants, modules)),
+        ("fan-out, 1 thread", lambda: render_variants(DATA, options, variants, workers=1)),
+        ("fan-out, threads", lambda: render_variants(DATA, options, variants)),
+    ]
+    print(f"{len(variants)} outputs ({args.sizes} x {args.formats}), best of {args.rounds}, "
+          f"{os.cpu_count()} CPUs:")
+    baseline = None
+    for name, fn in runs:
+        seconds = best_of(fn, args.rounds)
+        baseline = baseline or seconds
+        print(f"  {name:<18} {seconds * 1000:8.1f} ms  ({baseline / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""History store at scale: bulk insert, single inserts, paging and search.
+
+    python benchmarks/bench_history.py [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_history import HistoryStore
+
+TYPES = ["website", "email", "phone", "text", "wifi", "vcard"]
+WORDS = ["github", "example", "invoice", "menu", "ticket", "promo", "event", "store", "docs", "login"]
+
+
+def rows(count, start):
+    rng = random.Random(42)
+    for i in range(count):
+        word = rng.choice(WORDS)
+        when = (start + timedelta(seconds=i * 30)).isoformat()
+        yield f"https://{word}.example.com/{i}", rng.choice(TYPES), when
+
+
+def timed(label, fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<36} {elapsed * 1000:10.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = HistoryStore(os.path.join(folder, "history.db"))
+        print(f"FTS5 available: {store.has_fts}")
+
+        start = time.perf_counter()
+        source = rows(args.rows, datetime(2020, 1, 1))
+        while True:
+            chunk = [row for _, row in zip(range(args.batch), source)]
+            if not chunk:
+                break
+            store.add_many(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{'bulk insert':<36} {args.rows / elapsed:10.0f} rows/s")
+
+        timed("single insert (GUI path)", lambda: store.add("https://github.com", "website"), repeat=200)
+        timed("count", store.count)
+        first = timed("first page (200 rows)", lambda: store.page(200), repeat=20)
+
+        def deep_scroll(pages=50):
+            page = first
+            for _ in range(pages):
+                page = store.page(200, before=page[-1])
+            return page
+        timed("scroll 50 pages (keyset)", deep_scroll)
+
+        timed("search 'invoice' first page", lambda: store.page(200, query="invoice"), repeat=20)
+        timed("search 'invoice' count", lambda: store.count(query="invoice"))
+        timed("filter type=wifi first page", lambda: store.page(200, qr_type="wifi"), repeat=20)
+        timed("lookup by payload hash", lambda: store.find_by_payload("https://menu.example.com/12345"), repeat=20)
+        store.close()
+        size = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+        print(f"{'database size':<36} {size / 1024 / 1024:10.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare import time and memory of the GUI module and the headless core.
+
+Each module is imported in a fresh interpreter so the numbers reflect what a
+new worker process pays before it can render anything.
+
+    python benchmarks/bench_import.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "tkinter_loaded": "tkinter" in sys.modules,
+}}))
+"""
+
+
+def measure(module, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout))
+    return {
+        "module": module,
+        "import_ms": statistics.median(r["seconds"] for r in runs) * 1000,
+        "maxrss_mb": statistics.median(r["maxrss_kb"] for r in runs) / 1024,
+        "tkinter_loaded": runs[0]["tkinter_loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=["nmqr", "qr_render"])
+    args = parser.parse_args()
+
+    print(f"{'module':<12} {'import ms':>10} {'max RSS MB':>11}  tkinter")
+    for module in args.modules:
+        r = measure(module, args.repeat)
+        print(f"{r['module']:<12} {r['import_ms']:>10.1f} {r['maxrss_mb']:>11.1f}  {r['tkinter_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Logging and console overhead per generated code.
+
+Each iteration does what the GUI does around one render: one ``logger.info``
+and one ``print``. "sync" is the old pipeline (FileHandler + StreamHandler
+called inline, stdout written straight into the Text widget), "queued" is
+qr_logging (QueueHandler + listener thread, ConsoleBuffer drained every
+CONSOLE_FLUSH_MS). The render itself is timed separately so the overhead can
+be read as a share of it. The Text widget needs a display; without one the
+console side is measured against an in-memory list instead.
+
+    python benchmarks/bench_logging.py [--codes 2000]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_logging import ConsoleBuffer, setup_logging, stop_logging
+from qr_render import render_bytes
+
+
+def make_widget():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None, None
+    text = tk.Text(root)
+    text.pack()
+    return root, text
+
+
+class WidgetWriter:
+    """The old ConsoleRedirector"""
+
+    def __init__(self, widget):
+        self.widget = widget
+
+    def write(self, message):
+        self.widget.insert("end", message)
+        self.widget.see("end")
+
+    def flush(self):
+        pass
+
+
+class ListWriter:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, message):
+        self.chunks.append(message)
+
+    def flush(self):
+        pass
+
+
+def sync_logging(path, devnull):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in (logging.FileHandler(path, encoding='utf-8'), logging.StreamHandler(devnull)):
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def run(codes, console, logger):
+    stdout = sys.stdout
+    sys.stdout = console
+    try:
+        start = time.perf_counter()
+        for i in range(codes):
+            logger.info("Generated text QR code %d", i)
+            print(f"✓ Generated text QR code {i}")
+        return time.perf_counter() - start
+    finally:
+        sys.stdout = stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codes", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for i in range(200):
+        render_bytes(f"https://example.com/item/{i}")
+    render_ms = (time.perf_counter() - start) / 200 * 1000
+    print(f"render_bytes                 {render_ms:8.3f} ms per code")
+
+    tk_root, widget = make_widget()
+    if widget is None:
+        print("(no display: console writes go to a list instead of a Tk Text widget)")
+    logger = logging.getLogger("bench")
+
+    with tempfile.TemporaryDirectory() as folder, open(os.devnull, "w") as devnull:
+        sync_logging(os.path.join(folder, "sync.log"), devnull)
+        console = WidgetWriter(widget) if widget is not None else ListWriter()
+        elapsed = run(args.codes, console, logger)
+        if tk_root is not None:
+            tk_root.update()
+        report("sync", elapsed, args.codes, render_ms)
+
+        setup_logging(os.path.join(folder, "queued.log"), stream=devnull)
+        buffer = ConsoleBuffer()
+        elapsed = run(args.codes, buffer, logger)
+        start = time.perf_counter()
+        text, _ = buffer.drain()
+        if widget is not None:
+            widget.insert("end", text)
+            widget.see("end")
+            tk_root.update()
+        drained = time.perf_counter() - start
+        report("queued", elapsed, args.codes, render_ms)
+        print(f"  one batched flush of {args.codes} lines on the Tk side: {drained * 1000:.2f} ms")
+        stop_logging()
+
+    if tk_root is not None:
+        tk_root.destroy()
+
+
+def report(name, elapsed, codes, render_ms):
+    per_code = elapsed / codes * 1000
+    print(f"{name:<28} {per_code:8.3f} ms per code  ({per_code / render_ms:.1%} of a render)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cost of the qr_metrics stage hooks, disabled and enabled.
+
+Times a bare ``with timed(...)`` block and a full ``render_bytes`` call in
+both states; a render passes through four hooks (encode, rasterize, save,
+plus logo when one is set).
+
+    python benchmarks/bench_metrics.py [--hooks 200000] [--renders 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qr_metrics
+from qr_render import render_bytes
+
+
+def hook_cost(count):
+    timed = qr_metrics.timed
+    start = time.perf_counter()
+    for _ in range(count):
+        with timed("encode"):
+            pass
+    return (time.perf_counter() - start) / count
+
+
+def render_cost(count):
+    start = time.perf_counter()
+    for i in range(count):
+        render_bytes(f"https://example.com/item/{i}")
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hooks", type=int, default=200000)
+    parser.add_argument("--renders", type=int, default=300)
+    args = parser.parse_args()
+
+    render_cost(20)  # warm up imports and caches
+    for on in (False, True):
+        qr_metrics.enable(on)
+        qr_metrics.reset()
+        hook = hook_cost(args.hooks)
+        render = render_cost(args.renders)
+        state = "enabled" if on else "disabled"
+        print(f"{state:<9} hook {hook * 1e9:7.0f} ns   render_bytes {render * 1000:7.3f} ms "
+              f"(hooks ~{4 * hook / render:.3%} of a render)")
+
+
+if __name__ == "__main__":
+    main()
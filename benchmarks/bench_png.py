@@ -0,0 +1,91 @@
+"""PNG output: the plain RGB save against qr_png at each compression setting.
+
+"rgb" is how images were saved before: render() to RGB and ``img.save()``
+with Pillow's defaults. The other rows go through render_bytes(), which
+rasterizes straight to a palette and lets qr_png pick the smallest lossless
+mode. Every output is decoded and compared with the RGB render first.
+
+    python benchmarks/bench_png.py [--rounds 20] [--box-size 10]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from qr_png import COMPRESSION
+from qr_render import RenderOptions, render, render_bytes
+
+DATA = "https://example.com/catalogue/item/00042?ref=print"
+
+
+def make_logo(folder):
+    path = os.path.join(folder, "logo.png")
+    logo = Image.new("RGB", (120, 120), "#e53935")
+    ImageDraw.Draw(logo).ellipse((25, 25, 95, 95), fill="white")
+    logo.save(path)
+    return path
+
+
+def rgb_save(options):
+    buffer = io.BytesIO()
+    render(DATA, options).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def same_pixels(data, options):
+    expected = render(DATA, options)
+    decoded = Image.open(io.BytesIO(data)).convert("RGBA").convert(expected.mode)
+    return decoded.tobytes() == expected.tobytes()
+
+
+def best_of(fn, rounds):
+    fn()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--box-size", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        base = RenderOptions(box_size=args.box_size, error_correction="H")
+        cases = [
+            ("black on white", base),
+            ("navy on cream", replace(base, fg_color="navy", bg_color="#fff8e1")),
+            ("with logo", replace(base, logo_path=make_logo(folder))),
+            ("1 px per module", replace(base, box_size=1, border=0)),
+        ]
+        print(f"best of {args.rounds}, box size {args.box_size}:")
+        for name, options in cases:
+            print(f"  {name}")
+            runs = [("rgb", lambda: rgb_save(options))]
+            for level in COMPRESSION:
+                level_options = replace(options, compression=level)
+                runs.append((level, lambda o=level_options: render_bytes(DATA, o)))
+            baseline = None
+            for label, fn in runs:
+                data = fn()
+                if not same_pixels(data, options):
+                    raise SystemExit(f"{name}/{label}: pixels differ from the RGB render")
+                seconds = best_of(fn, args.rounds)
+                baseline = baseline or (len(data), seconds)
+                print(f"    {label:<8} {len(data):7} bytes ({len(data) / baseline[0]:5.0%})  "
+                      f"{seconds * 1000:7.2f} ms ({baseline[1] / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Throughput of fixed EC H against the automatic encode profile.
+
+    python benchmarks/bench_profile.py [--items 300] [--logo path/to/logo.png]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_payloads import vcard_payload, wifi_payload
+from qr_profile import choose_profile
+from qr_render import RenderOptions, build_qr, render_bytes
+
+PAYLOADS = {
+    "url": lambda i: f"https://shop.example.com/products/{i}?utm_source=qr",
+    "wifi": lambda i: wifi_payload(f"Office-Guest-{i}", f"pass-{i:06d}"),
+    "vcard": lambda i: vcard_payload(f"Contact Number {i}", f"+1555{i:07d}", f"contact{i}@example.com"),
+}
+
+
+def rate(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--logo", help="logo used for the 'with logo' rows")
+    args = parser.parse_args()
+
+    setups = [("H", RenderOptions(error_correction="H")), ("auto", RenderOptions(error_correction="auto"))]
+    if args.logo:
+        setups += [("H + logo", RenderOptions(error_correction="H", logo_path=args.logo)),
+                   ("auto + logo", RenderOptions(error_correction="auto", logo_path=args.logo))]
+
+    print(f"{'payload':<7} {'profile':<12} {'modules':>8} {'encode/s':>10} {'png/s':>8}")
+    for name, make in PAYLOADS.items():
+        items = [make(i) for i in range(args.items)]
+        for label, options in setups:
+            modules = build_qr(items[0], options).modules_count
+            encode = rate(lambda d: build_qr(d, options), items)
+            png = rate(lambda d: render_bytes(d, options), items)
+            print(f"{name:<7} {label:<12} {modules:>5}x{modules:<2} {encode:>10.0f} {png:>8.0f}")
+        print(f"        {choose_profile(items[0], setups[-1][1]).report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Rasterizer microbenchmark and pixel-exactness check.
+
+Every case is first checked pixel-for-pixel against qrcode's own drawer
+(``make_image(...).convert("RGB")``); the script exits non-zero on any
+mismatch before timing anything.
+
+    python benchmarks/bench_raster.py [--versions 1 10 25 40] [--box-sizes 1 4 10]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode
+
+import qr_raster
+from qr_raster import rasterize
+
+COLORS = [("black", "white"), ("#1a73e8", "#fffbe6"), ("darkred", "ivory")]
+
+
+def build(version, box_size):
+    qr = qrcode.QRCode(version=version, error_correction=qrcode.constants.ERROR_CORRECT_H,
+                       box_size=box_size, border=4)
+    qr.add_data("12345")
+    qr.make(fit=False)
+    return qr
+
+
+def drawer(qr, fg, bg):
+    return qr.make_image(fill_color=fg, back_color=bg).convert("RGB")
+
+
+def check(versions, box_sizes):
+    failures = 0
+    for version in versions:
+        for box_size in box_sizes:
+            qr = build(version, box_size)
+            for fg, bg in COLORS:
+                expected = drawer(qr, fg, bg).tobytes()
+                for backend in ("numpy", "pil"):
+                    if backend == "numpy" and qr_raster.numpy_module() is None:
+                        continue
+                    saved, qr_raster.np = qr_raster.np, (qr_raster.np if backend == "numpy" else False)
+                    try:
+                        actual = rasterize(qr.get_matrix(), box_size, fg, bg).tobytes()
+                    finally:
+                        qr_raster.np = saved
+                    if actual != expected:
+                        failures += 1
+                        print(f"MISMATCH version={version} box={box_size} {fg}/{bg} ({backend})")
+    return failures
+
+
+def best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, nargs="*", default=[1, 10, 25, 40])
+    parser.add_argument("--box-sizes", type=int, nargs="*", default=[1, 4, 10])
+    parser.add_argument("--number", type=int, default=10)
+    args = parser.parse_args()
+
+    if check(args.versions, args.box_sizes):
+        sys.exit(1)
+    print("pixel check: identical to qrcode's drawer for all cases\n")
+
+    print(f"{'version':>7} {'box':>4} {'drawer ms':>10} {'RGB ms':>8} {'P ms':>8} {'1 ms':>8} {'speedup':>8}")
+    for version in args.versions:
+        for box_size in args.box_sizes:
+            qr = build(version, box_size)
+            matrix = qr.get_matrix()
+            base = best(lambda: drawer(qr, "navy", "white"), args.number)
+            rgb = best(lambda: rasterize(qr.get_matrix(), box_size, "navy", "white"), args.number)
+            pal = best(lambda: rasterize(matrix, box_size, "navy", "white", mode="P"), args.number)
+            bw = best(lambda: rasterize(matrix, box_size, mode="1"), args.number)
+            print(f"{version:>7} {box_size:>4} {base:>10.2f} {rgb:>8.2f} {pal:>8.2f} {bw:>8.2f} {base / rgb:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
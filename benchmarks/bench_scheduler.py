@@ -0,0 +1,92 @@
+"""Peak memory of a batch as the input grows: in-memory list against BatchScheduler.
+
+"list" is how the GUI batch used to run: the whole input read into a list of
+items, rendered with run_batch() and added to an archive. "scheduler" streams
+the same file through BatchScheduler with a fixed memory budget. Both write
+to a ZIP archive through a writer throttled to ``--write-ms`` per result, so
+the writer is the slow stage. Every run is a fresh process, so peak RSS
+belongs to that run alone.
+
+    python benchmarks/bench_scheduler.py [--counts 500,2000,8000] [--budget 8] [--write-ms 1]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_input(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(count):
+            f.write(f"https://example.com/catalogue/item/{index:08d}?ref=print&campaign=autumn-{index % 97}\n")
+
+
+def child(mode, path, budget, write_ms, workers):
+    from qr_archive import ArchiveWriter, default_template
+    from qr_batch import BatchJob, run_batch
+    from qr_render import RenderOptions
+    from qr_scheduler import BatchScheduler, peak_rss
+
+    options = RenderOptions(box_size=4, error_correction="L")
+    filename = default_template(None)
+    target = os.path.join(os.path.dirname(path), f"{mode}.zip")
+    spilled = 0
+    start = time.perf_counter()
+    with ArchiveWriter(target) as writer:
+        def write(result):
+            time.sleep(write_ms / 1000)
+            writer.add(result)
+
+        if mode == "list":
+            with open(path, encoding="utf-8") as f:
+                items = [line.strip() for line in f.read().split("\n") if line.strip()]
+            for result in run_batch(items, options, "", workers=workers, filename=filename, keep_bytes=True):
+                write(result)
+        else:
+            with open(path, encoding="utf-8") as f:
+                jobs = (BatchJob(index, {"data": line.strip()}, options, filename.format(index=index),
+                                 keep_bytes=True)
+                        for index, line in enumerate(f, start=1))
+                scheduler = BatchScheduler(workers=workers, memory_budget=budget * 2 ** 20)
+                spilled = scheduler.run(jobs, write).spilled
+    seconds = time.perf_counter() - start
+    rss = peak_rss() or {"main": 0, "workers": 0}
+    print(json.dumps({"seconds": seconds, "main": rss["main"], "workers": rss["workers"], "spilled": spilled}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", default="500,2000,8000")
+    parser.add_argument("--budget", type=int, default=8, help="scheduler memory budget in MB")
+    parser.add_argument("--write-ms", type=float, default=1.0, help="writer delay per result")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "INPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.budget, args.write_ms, args.workers)
+        return
+
+    print(f"budget {args.budget} MB, writer {args.write_ms} ms/result, {os.cpu_count()} CPUs")
+    print(f"  {'items':>7} {'mode':<10} {'seconds':>8} {'main MB':>8} {'worker MB':>10} {'spilled':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        for count in (int(c) for c in args.counts.split(",")):
+            path = os.path.join(folder, f"input_{count}.txt")
+            write_input(path, count)
+            for mode in ("list", "scheduler"):
+                command = [sys.executable, __file__, "--child", mode, path, "--budget", str(args.budget),
+                           "--write-ms", str(args.write_ms)]
+                if args.workers:
+                    command += ["--workers", str(args.workers)]
+                run = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+                print(f"  {count:>7} {mode:<10} {run['seconds']:8.1f} {run['main']:8.0f} {run['workers']:10.0f} "
+                      f"{run['spilled']:8}")
+
+
+if __name__ == "__main__":
+    main()
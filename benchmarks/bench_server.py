@@ -0,0 +1,114 @@
+"""Load test for the local HTTP rendering service.
+
+Starts ``nmqr.py serve`` on a free localhost port (or targets --url), then
+runs concurrent clients that each keep one connection alive and report
+requests/second and p50/p99 latency for three workloads: unique payloads,
+repeated payloads (served from the response cache) and conditional GETs
+answered with 304.
+
+    python benchmarks/bench_server.py [--clients 8] [--requests 200] [--workers 4]
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(host, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("service did not come up")
+
+
+def client(host, port, paths, conditional, latencies, errors):
+    conn = http.client.HTTPConnection(host, port)
+    etags = {}
+    for path in paths:
+        headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status not in (200, 304):
+            errors.append(response.status)
+        etags[path] = response.getheader("ETag")
+    conn.close()
+
+
+def run(host, port, name, clients, make_paths, conditional=False):
+    latencies, errors, threads = [], [], []
+    for c in range(clients):
+        paths = make_paths(c)
+        threads.append(threading.Thread(target=client, args=(host, port, paths, conditional, latencies, errors)))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{name:<14} {len(latencies) / elapsed:>9.1f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+          f"  errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="existing service, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--workers", type=int, help="worker processes for the spawned service")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        host, port = "127.0.0.1", free_port()
+        command = [sys.executable, os.path.join(ROOT, "nmqr.py"), "serve", "--port", str(port)]
+        if args.workers:
+            command += ["--workers", str(args.workers)]
+        server = subprocess.Popen(command, cwd=ROOT, stderr=subprocess.DEVNULL)
+
+    try:
+        wait_ready(host, port)
+        n = args.requests
+        run(host, port, "unique", args.clients,
+            lambda c: [f"/render?data={quote(f'https://example.com/{c}/{i}')}" for i in range(n)])
+        run(host, port, "repeated", args.clients,
+            lambda c: [f"/render?data={quote(f'https://example.com/{i % 20}')}" for i in range(n)])
+        run(host, port, "conditional", args.clients,
+            lambda c: [f"/render?data={quote(f'https://example.com/{i % 20}')}" for i in range(n)],
+            conditional=True)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Render pipeline benchmark suite with saved results and regression checks.
+
+Every case runs one of the code paths the application uses:
+
+    generate   what the Generate button does: full-size render plus preview
+    batch      one batch job (payload building, render, encode to bytes)
+
+over each payload class (short URL, text near the version 40 capacity of the
+level, WiFi, vCard), error-correction level, logo on/off and, for batch,
+PNG and SVG output. The render cache is disabled so every iteration does the
+full work. A multi-process batch run measures throughput, and peak RSS is
+recorded for this process and its workers.
+
+    python benchmarks/bench_suite.py run [-o results.json] [--iterations 20] [--quick]
+    python benchmarks/bench_suite.py compare old.json new.json [--threshold 10]
+
+``compare`` exits non-zero when any case's median latency (or the batch
+throughput) got worse by more than the threshold percentage. On a noisy
+machine, ``--metric min_ms`` compares best-of-N times instead. ``--quick``
+is a smoke test; its three samples per case are too few to compare.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib import metadata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw
+from qrcode import util
+
+import qr_cache
+from qr_batch import BatchJob, render_job, run_jobs
+from qr_payloads import build_payload
+from qr_render import ERROR_LEVELS, RenderOptions, render, render_preview
+from qr_scheduler import peak_rss
+
+LEVELS = ["L", "M", "Q", "H"]
+FORMATS = {"PNG": ".png", "SVG": ".svg"}
+PREVIEW_SIZE = 350
+
+
+def near_capacity_text(level, share=0.9):
+    """Byte-mode text filling ``share`` of a version 40 symbol at ``level``"""
+    bits = util.BIT_LIMIT_TABLE[ERROR_LEVELS[level]][40]
+    chars = int((bits - 4 - 16) // 8 * share)
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit "
+    return (words * (chars // len(words) + 1))[:chars]
+
+
+def payload_fields(name, level):
+    if name == "short_url":
+        return {"data": "https://example.com/p/42"}
+    if name == "long_text":
+        return {"type": "text", "data": near_capacity_text(level)}
+    if name == "wifi":
+        return {"type": "wifi", "ssid": "Office Guest", "password": "correct horse battery"}
+    if name == "vcard":
+        return {"type": "vcard", "name": "Ada Lovelace", "phone": "+44 20 7946 0000",
+                "email": "ada@example.com"}
+    raise ValueError(name)
+
+
+PAYLOADS = ["short_url", "long_text", "wifi", "vcard"]
+
+
+def make_logo(folder):
+    path = os.path.join(folder, "logo.png")
+    img = Image.new("RGB", (256, 256), "#1a73e8")
+    ImageDraw.Draw(img).ellipse((48, 48, 208, 208), fill="white")
+    img.save(path)
+    return path
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(samples, extra=None):
+    result = {
+        "iterations": len(samples),
+        "min_ms": min(samples) * 1000,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "throughput_per_s": len(samples) / sum(samples),
+    }
+    result.update(extra or {})
+    return result
+
+
+def time_calls(fn, iterations, warmup=2):
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def cases(logo_path):
+    for payload in PAYLOADS:
+        for level in LEVELS:
+            for logo in (False, True):
+                options = RenderOptions(error_correction=level, logo_path=logo_path if logo else None)
+                base = {"payload": payload, "ec": level, "logo": logo}
+                yield "generate", "PNG", base, options
+                for fmt in FORMATS:
+                    yield "batch", fmt, base, options
+
+
+def case_name(path, fmt, base):
+    return f"{path}/{base['payload']}/{base['ec']}/{'logo' if base['logo'] else 'plain'}/{fmt.lower()}"
+
+
+def run_case(path, fmt, base, options, iterations, folder):
+    fields = payload_fields(base["payload"], base["ec"])
+    if path == "generate":
+        data, _ = build_payload(fields)
+
+        def once():
+            render(data, options)
+            render_preview(data, options, PREVIEW_SIZE)
+        return summarize(time_calls(once, iterations))
+
+    job = BatchJob(0, fields, options, os.path.join(folder, "case" + FORMATS[fmt]), keep_bytes=True)
+    sizes = []
+
+    def once():
+        result = render_job(job)
+        if not result.ok:
+            raise RuntimeError(result.error)
+        sizes.append(result.size)
+    return summarize(time_calls(once, iterations), {"bytes": sizes[-1]})
+
+
+def batch_throughput(count, workers, logo_path, folder):
+    """Mixed batch through the process pool, written to disk like batch_generate()"""
+    jobs = []
+    for index in range(count):
+        payload = PAYLOADS[index % len(PAYLOADS)]
+        level = LEVELS[index % len(LEVELS)]
+        options = RenderOptions(error_correction=level, logo_path=logo_path if index % 2 else None)
+        fields = dict(payload_fields(payload, level))
+        if "data" in fields and payload != "long_text":
+            fields["data"] += f"?n={index}"
+        jobs.append(BatchJob(index, fields, options, os.path.join(folder, f"qr_{index:06d}.png")))
+
+    start = time.perf_counter()
+    failed = sum(not result.ok for result in run_jobs(jobs, workers=workers, cache_bytes=0))
+    elapsed = time.perf_counter() - start
+    return {"items": count, "workers": workers, "failed": failed, "seconds": elapsed,
+            "throughput_per_s": count / elapsed}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    versions = {}
+    for package in ("qrcode", "pillow", "numpy"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def cmd_run(args):
+    iterations = 3 if args.quick else args.iterations
+    qr_cache.configure(0)  # measure rendering, not cache hits
+    results = {"environment": environment(), "cases": {}}
+
+    with tempfile.TemporaryDirectory() as folder:
+        logo_path = make_logo(folder)
+        for path, fmt, base, options in cases(logo_path):
+            name = case_name(path, fmt, base)
+            results["cases"][name] = {"path": path, "format": fmt, **base,
+                                      **run_case(path, fmt, base, options, iterations, folder)}
+            r = results["cases"][name]
+            print(f"{name:<36} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                  f"{r['throughput_per_s']:8.1f}/s", file=sys.stderr)
+
+        count = 64 if args.quick else args.batch_items
+        results["batch"] = batch_throughput(count, args.workers, logo_path, folder)
+        print(f"{'batch throughput':<36} {results['batch']['throughput_per_s']:.1f} codes/s "
+              f"with {args.workers or os.cpu_count()} workers", file=sys.stderr)
+
+    results["peak_rss_mb"] = peak_rss()  # None on Windows, which has no resource module
+    if results["peak_rss_mb"]:
+        print(f"peak RSS: {results['peak_rss_mb']['main']:.1f} MB main, "
+              f"{results['peak_rss_mb']['workers']:.1f} MB largest child process", file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_compare(args):
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    limit = 1 + args.threshold / 100
+    metric = args.metric
+    regressions = 0
+    print(f"{'case':<36} {'old ' + metric:>10} {'new ' + metric:>10} {'change':>8}")
+    for name, after in new["cases"].items():
+        before = old["cases"].get(name)
+        if before is None or metric not in before:
+            print(f"{name:<36} {'-':>10} {after[metric]:>10.2f}      new")
+            continue
+        change = after[metric] / before[metric] - 1
+        flag = ""
+        if after[metric] > before[metric] * limit:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<36} {before[metric]:>10.2f} {after[metric]:>10.2f} {change:>+8.1%}{flag}")
+
+    if "batch" in old and "batch" in new:
+        before, after = old["batch"]["throughput_per_s"], new["batch"]["throughput_per_s"]
+        flag = ""
+        if after * limit < before:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{'batch throughput (codes/s)':<36} {before:>10.1f} {after:>10.1f} "
+              f"{after / before - 1:>+8.1%}{flag}")
+
+    for label, results in (("old", old), ("new", new)):
+        env = results["environment"]
+        print(f"{label}: {env['timestamp']} commit {env['commit']} python {env['python']} "
+              f"qrcode {env['versions']['qrcode']} pillow {env['versions']['pillow']}")
+    print(f"{regressions} regression(s) over {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and save results as JSON")
+    run.add_argument("-o", "--output", default=os.path.join(ROOT, "benchmarks", "bench_results.json"),
+                     help="results file (default: benchmarks/bench_results.json, ignored by git)")
+    run.add_argument("--iterations", type=int, default=20, help="timed iterations per case")
+    run.add_argument("--batch-items", type=int, default=400)
+    run.add_argument("--workers", type=int, help="batch worker processes (default: all cores)")
+    run.add_argument("--quick", action="store_true", help="3 iterations per case, small batch")
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser("compare", help="flag regressions between two result files")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=10, help="allowed slowdown in percent")
+    compare.add_argument("--metric", choices=["p50_ms", "p95_ms", "mean_ms", "min_ms"], default="p50_ms")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
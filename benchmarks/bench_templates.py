@@ -0,0 +1,109 @@
+"""Payload building for bulk WiFi/vCard rows: compiled templates against per-row formatting.
+
+"per-row" is what a straightforward loop does for every row: split the
+``field=source`` mappings, ``str.format`` the column templates, escape each
+value with a chain of ``replace()`` calls and format the card. "compiled"
+is qr_templates: the mapping is parsed and the card laid out once, and each
+row only looks columns up, translates and joins. Both produce the same
+payloads, which is checked first. The render cost of a few of the codes is
+shown for scale, since that is what the payload builder shares a worker with.
+
+    python benchmarks/bench_templates.py [--rows 100000] [--kind vcard]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_render import RenderOptions, render_bytes
+from qr_templates import PayloadTemplate, compile_template, parse_fields
+
+MAPPINGS = {
+    "vcard": ["name={First} {Last}", "given=First", "family=Last", "org=Company", "phone=Mobile",
+              "email=Email", "note=Notes"],
+    "wifi": ["ssid=Network", "password=Key", "security=Auth"],
+}
+
+
+def make_rows(kind, count, seed=42):
+    rng = random.Random(seed)
+    words = ["north", "south", "cafe", "Acme, Inc", "lab;2", "guest:5g", "O'Neil", "dept\\ops"]
+    rows = []
+    for index in range(count):
+        if kind == "vcard":
+            rows.append({"First": rng.choice(["Ada", "Alan", "Grace", "Edsger"]), "Last": f"Smith{index}",
+                         "Company": rng.choice(words), "Mobile": f"+44 20 {rng.randint(1000, 9999)} {index:04d}",
+                         "Email": f"user{index}@example.com", "Notes": rng.choice(["", "VIP", "line 1\nline 2"])})
+        else:
+            rows.append({"Network": f"{rng.choice(words)}-{index}", "Key": f"pw;{index:06d}",
+                         "Auth": rng.choice(["WPA2", "WPA3", "open"])})
+    return rows
+
+
+def escape(value, chars):
+    for char in chars:
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def per_row(kind, specs, row):
+    """The payload built from scratch for one row"""
+    fields = {}
+    for spec in specs:
+        field, _, source = spec.partition("=")
+        fields[field] = (source.format_map(row) if "{" in source else row.get(source, "")).strip()
+    if kind == "wifi":
+        security = {"wpa2": "WPA", "wpa3": "SAE", "open": "nopass"}[fields["security"].lower()]
+        ssid, password = (escape(fields[field], '\\;,:"') for field in ("ssid", "password"))
+        secret = "" if security == "nopass" else f";P:{password}"
+        return f"WIFI:S:{ssid};T:{security}{secret};;"
+    text = {key: escape(value, "\\,;").replace("\n", "\\n") for key, value in fields.items()}
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{text['name']}", f"N:{text['family']};{text['given']};;;"]
+    for prop, field in (("ORG", "org"), ("TEL", "phone"), ("EMAIL", "email"), ("NOTE", "note")):
+        if text[field]:
+            lines.append(f"{prop}:{text[field]}")
+    return "\r\n".join(lines) + "\r\nEND:VCARD"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--kind", choices=sorted(MAPPINGS), default="vcard")
+    parser.add_argument("--render-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    specs = MAPPINGS[args.kind]
+    rows = make_rows(args.kind, args.rows)
+    template = PayloadTemplate(args.kind, parse_fields(args.kind, specs))
+    build = compile_template(template)
+    for row in rows[:1000]:
+        if build(row) != per_row(args.kind, specs, row):
+            raise SystemExit(f"payloads differ for {row}")
+
+    print(f"{args.rows} {args.kind} rows:")
+    results = {}
+    for label, fn in (("per-row", lambda row: per_row(args.kind, specs, row)),
+                      ("compiled", lambda row: compile_template(template)(row))):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        seconds = time.perf_counter() - start
+        results[label] = seconds
+        print(f"  {label:<9} {args.rows / seconds:10,.0f} rows/s  {seconds / args.rows * 1e6:6.2f} us/row  "
+              f"({results['per-row'] / seconds:.2f}x)")
+
+    sample = [build(row) for row in rows[:args.render_sample]]
+    options = RenderOptions()
+    start = time.perf_counter()
+    for payload in sample:
+        render_bytes(payload, options)
+    render_us = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"  render    {render_us:10,.0f} us/code, so building is "
+          f"{results['compiled'] / args.rows * 1e6 / render_us:.2%} of a code's time")
+
+
+if __name__ == "__main__":
+    main()
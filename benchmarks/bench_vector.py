@@ -0,0 +1,52 @@
+"""Vector export against PNG at print resolutions: file size and encode time.
+
+Sizes are the pixel widths a PNG needs for the given print width and DPI;
+the vector files are resolution independent and stay the same size.
+
+    python benchmarks/bench_vector.py [--logo path/to/logo.png]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qr_render import RenderOptions, build_qr, render_bytes
+
+PAYLOADS = {
+    "url": "https://github.com/komonaelliy/qr-code-generator",
+    "vcard": "BEGIN:VCARD\nVERSION:3.0\nFN:Jane Doe\nTEL:+15551234567\nEMAIL:jane@example.com\nEND:VCARD",
+}
+PRINTS = [("5cm @ 300dpi", 5, 300), ("10cm @ 300dpi", 10, 300), ("10cm @ 600dpi", 10, 600),
+          ("A4 width @ 600dpi", 21, 600)]
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logo", help="include this logo in every output")
+    args = parser.parse_args()
+
+    print(f"{'payload':<7} {'print size':<18} {'format':<5} {'bytes':>10} {'ms':>9}")
+    for name, data in PAYLOADS.items():
+        modules = build_qr(data, RenderOptions()).modules_count + 8
+        for label, cm, dpi in PRINTS:
+            pixels = round(cm / 2.54 * dpi)
+            options = RenderOptions(box_size=max(1, pixels // modules), logo_path=args.logo)
+            for fmt in ("PNG", "SVG", "PDF", "EPS"):
+                out, elapsed = timed(lambda: render_bytes(data, options, fmt))
+                print(f"{name:<7} {label:<18} {fmt:<5} {len(out):>10} {elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
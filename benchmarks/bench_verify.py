@@ -0,0 +1,71 @@
+"""Batch throughput with decode verification off, sampled and on for every code.
+
+Renders the same batch (with a logo, so some codes are close to the edge of
+their error correction) through run_batch() at each ``--verify`` share and
+reports codes per second and how many codes didn't decode. Verification runs
+in the workers, so with several CPUs it costs throughput, not latency.
+
+    python benchmarks/bench_verify.py [--count 400] [--workers N] [--logo-size 30]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from qr_batch import run_batch
+from qr_render import RenderOptions
+
+SHARES = [0.0, 0.1, 1.0]
+
+
+def make_items(count, seed=42):
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+    return [f"https://example.com/{''.join(rng.choice(alphabet) for _ in range(rng.randint(4, 120)))}"
+            for _ in range(count)]
+
+
+def make_logo(folder):
+    path = os.path.join(folder, "logo.png")
+    logo = Image.new("RGB", (120, 120), "#1e88e5")
+    ImageDraw.Draw(logo).rectangle((30, 30, 90, 90), fill="white")
+    logo.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--logo-size", type=int, default=30)
+    parser.add_argument("--error-correction", default="auto")
+    args = parser.parse_args()
+
+    items = make_items(args.count)
+    with tempfile.TemporaryDirectory() as folder:
+        options = RenderOptions(logo_path=make_logo(folder), logo_size=args.logo_size,
+                                error_correction=args.error_correction)
+        print(f"{args.count} codes, logo {args.logo_size}%, EC {args.error_correction}, "
+              f"{args.workers or os.cpu_count()} workers:")
+        baseline = None
+        for share in SHARES:
+            start = time.perf_counter()
+            results = list(run_batch(items, options, "", workers=args.workers, keep_bytes=True, verify=share,
+                                     cache_bytes=0))
+            seconds = time.perf_counter() - start
+            checked = [r for r in results if r.verified is not None]
+            unreadable = sum(1 for r in checked if not r.verified)
+            rate = len(results) / seconds
+            baseline = baseline or rate
+            print(f"  verify {share:>4.0%}  {rate:7.1f} codes/s ({rate / baseline:.2f}x)  "
+                  f"checked {len(checked):4}  unreadable {unreadable}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,42 @@
-import qrcode
+import sys
+import time
+
+STARTUP_BEGAN = time.perf_counter()
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Command-line use never needs tkinter
+    from qr_cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, colorchooser, simpledialog
-from PIL import Image, ImageTk, ImageOps, ImageDraw
-import re
-import webbrowser
-import json
 import os
 from datetime import datetime
+import importlib
 import logging
-import sys
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from qr_payloads import DOMAIN_TEST_INPUTS, detect_input_type, wifi_payload, vcard_payload
+from qr_logging import CONSOLE_MAX_LINES, ConsoleBuffer, setup_logging
+import qr_metrics
+
+# The render stack (qrcode, Pillow, NumPy), history database and batch
+# modules are imported inside the methods that use them, and preloaded on a
+# background thread once the window is up (see preload_modules).
+PRELOAD_MODULES = ["qr_render", "qr_cache", "qr_profile", "qr_vector", "PIL.ImageTk"]
+
+IMPORTS_DONE = time.perf_counter()
+
+PREVIEW_SIZE = 350
+PREVIEW_DELAY_MS = 250
+PREVIEW_POLL_MS = 15
+HISTORY_PAGE_SIZE = 200
+CONSOLE_FLUSH_MS = 100
+VERIFY_SHARES = {"Off": 0.0, "10%": 0.1, "All": 1.0}  # batch decode checks
+WIFI_SECURITY_CHOICES = ["WPA/WPA2", "WPA3", "WEP", "None"]  # names qr_templates.wifi_security() knows
 
 class QRCodeGenerator:
     def __init__(self, root):
@@ -29,8 +57,43 @@ class QRCodeGenerator:
         self.logo_path = None
         self.history = []
         self.history_file = "qr_history.json"
+        self.history_db = "qr_history.db"
+        self._render_cache = None
+        self.current_qr_image = None
+
+        # Settings read by the renderer; the Customize tab only shows them
+        self.logo_size = tk.IntVar(value=25)
+        self.error_correction = tk.StringVar(value="auto")
+        self.batch_workers = tk.IntVar(value=os.cpu_count() or 1)
+        self.batch_format = tk.StringVar(value="PNG")
+        self.batch_output = tk.StringVar(value="Folder")
+        self.batch_verify = tk.StringVar(value="Off")
+        self.wifi_security = tk.StringVar(value="WPA/WPA2")
+        self.wifi_hidden = tk.BooleanVar(value=False)
+        self.vcard_version = tk.StringVar(value="3.0")
+        self.export_sizes = tk.StringVar(value="")
+        self.export_formats = tk.StringVar(value="")
+        self.png_compression = tk.StringVar(value="default")
+        self.unscaled = tk.BooleanVar(value=False)
+        self.batch_summary = ""
+        self.collect_timings = tk.BooleanVar(value=True)
+        qr_metrics.enable(self.collect_timings.get())
+
+        # Startup report: (phase, seconds since the process started), module import times
+        self.startup_marks = [("imports", IMPORTS_DONE - STARTUP_BEGAN)]
+        self.import_times = {}
+
+        # Live preview state: renders run on a single worker thread
+        self.preview_executor = ThreadPoolExecutor(max_workers=1)
+        self.preview_queue = queue.Queue()
+        self.preview_future = None
+        self.preview_after = None
+        self.preview_generation = 0
+        self.preview_polling = False
+        self.preview_latencies = deque(maxlen=50)
         
         self.logger.info("QR Code Generator started")
+        self.redirect_stdout()
         
         # Load history
         self.load_history()
@@ -57,21 +120,56 @@ class QRCodeGenerator:
         self.notebook.add(self.about_frame, text="ℹ️ About")
 
         self.setup_generator_tab()
-        self.setup_settings_tab()
-        self.setup_history_tab()
-        self.setup_debug_tab()
-        self.setup_about_tab()
+        self.mark_startup("window built")
+
+        # The other tabs are built the first time they are selected
+        self.tab_builders = {
+            str(self.settings_frame): self.setup_settings_tab,
+            str(self.history_frame): self.setup_history_tab,
+            str(self.debug_frame): self.setup_debug_tab,
+            str(self.about_frame): self.setup_about_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.root.after_idle(self.on_first_paint)
+
+    def mark_startup(self, phase):
+        self.startup_marks.append((phase, time.perf_counter() - STARTUP_BEGAN))
+
+    def on_tab_changed(self, event=None):
+        """Build a tab the first time it is selected"""
+        builder = self.tab_builders.pop(self.notebook.select(), None)
+        if builder:
+            builder()
+
+    def on_first_paint(self):
+        self.mark_startup("first paint")
+        threading.Thread(target=self.preload_modules, daemon=True).start()
+
+    def preload_modules(self):
+        """Import the render stack in the background so the first preview doesn't wait for it"""
+        for name in PRELOAD_MODULES:
+            if name in sys.modules:
+                continue
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                self.logger.warning("Could not preload %s: %s", name, e)
+                continue
+            self.import_times[name] = time.perf_counter() - start
+        self.mark_startup("modules preloaded")
+
+    @property
+    def render_cache(self):
+        if self._render_cache is None:
+            from qr_cache import RenderCache
+
+            self._render_cache = RenderCache()
+        return self._render_cache
 
     def setup_logging(self):
         """Setup logging"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('qr_generator.log', encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        setup_logging('qr_generator.log')
         self.logger = logging.getLogger(__name__)
 
     def setup_about_tab(self):
@@ -120,11 +218,16 @@ Developed with ❤️ for the community
 
         # GitHub button
         github_btn = tk.Button(self.about_frame, text="⭐ Star on GitHub", 
-                              command=lambda: webbrowser.open("https://github.com"),
+                              command=self.open_github,
                               bg="#2d3748", fg="white", font=("Arial", 12, "bold"),
                               padx=20, pady=10)
         github_btn.pack(pady=10)
 
+    def open_github(self):
+        import webbrowser
+
+        webbrowser.open("https://github.com")
+
     def setup_debug_tab(self):
         """Setup debug console"""
         console_frame = ttk.Frame(self.debug_frame)
@@ -145,20 +248,41 @@ Developed with ❤️ for the community
         ttk.Button(btn_frame, text="Clear Console", command=self.clear_console).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Test Domain Detection", command=self.test_domain_detection).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Show System Info", command=self.show_system_info).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Show Timings", command=self.show_timings).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Export Timings", command=self.export_timings).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Startup Report", command=self.show_startup_report).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(btn_frame, text="Collect timings", variable=self.collect_timings,
+                        command=lambda: qr_metrics.enable(self.collect_timings.get())).pack(side=tk.LEFT, padx=2)
 
-        self.redirect_stdout()
+        self.preview_stats_label = ttk.Label(self.debug_frame, text="Preview latency: no previews yet")
+        self.preview_stats_label.pack(fill=tk.X, padx=5, pady=2)
+
+        marks = dict(self.startup_marks)
+        if "first paint" in marks:
+            ttk.Label(self.debug_frame, text=f"Startup: imports {marks['imports'] * 1000:.0f} ms, "
+                                             f"first paint {marks['first paint'] * 1000:.0f} ms").pack(
+                fill=tk.X, padx=5, pady=2)
+
+        self.flush_console()
 
     def redirect_stdout(self):
-        """Redirect stdout to console"""
-        class ConsoleRedirector:
-            def __init__(self, text_widget):
-                self.text_widget = text_widget
-            def write(self, message):
-                self.text_widget.insert(tk.END, message)
-                self.text_widget.see(tk.END)
-            def flush(self):
-                pass
-        sys.stdout = ConsoleRedirector(self.console_text)
+        """Redirect stdout to a buffer; the Debug tab moves it into the widget in batches"""
+        self.console_buffer = ConsoleBuffer(CONSOLE_MAX_LINES)
+        sys.stdout = self.console_buffer
+
+    def flush_console(self):
+        """Move buffered output into the console widget, keeping at most CONSOLE_MAX_LINES"""
+        text, dropped = self.console_buffer.drain()
+        if dropped:
+            self.console_text.insert(tk.END, f"... {dropped} lines dropped ...\n")
+        if text:
+            self.console_text.insert(tk.END, text)
+        if text or dropped:
+            lines = int(self.console_text.index('end-1c').split('.')[0])
+            if lines > CONSOLE_MAX_LINES:
+                self.console_text.delete('1.0', f'{lines - CONSOLE_MAX_LINES + 1}.0')
+            self.console_text.see(tk.END)
+        self.root.after(CONSOLE_FLUSH_MS, self.flush_console)
 
     def clear_console(self):
         self.console_text.delete(1.0, tk.END)
@@ -171,12 +295,51 @@ Developed with ❤️ for the community
         print(f"Platform: {platform.system()} {platform.release()}")
         print(f"Tkinter: {tk.TkVersion}")
         print(f"Current Directory: {os.getcwd()}")
+        stats = self.render_cache.stats()
+        print(f"Render cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions, {stats['entries']} entries, "
+              f"{stats['bytes'] / 1024:.0f}/{stats['max_bytes'] / 1024:.0f} KB")
+
+    def show_startup_report(self):
+        """Startup phases and the modules imported after the window appeared"""
+        print("\n=== STARTUP ===")
+        for phase, seconds in self.startup_marks:
+            print(f"{phase:<20} {seconds * 1000:8.1f} ms after start")
+        if self.import_times:
+            print("Background imports (cumulative, like -X importtime):")
+            for name, seconds in sorted(self.import_times.items(), key=lambda item: -item[1]):
+                print(f"  {name:<18} {seconds * 1000:8.1f} ms")
+        pending = [name for name in PRELOAD_MODULES if name not in sys.modules]
+        if pending:
+            print(f"Not loaded yet: {', '.join(pending)}")
+
+    def show_timings(self):
+        """Per-stage timing histograms collected since startup"""
+        print("\n=== STAGE TIMINGS ===")
+        lines = qr_metrics.summary()
+        if not lines:
+            print("No timings yet" if qr_metrics.enabled() else "Timing collection is off")
+        for line in lines:
+            print(line)
+
+    def export_timings(self):
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")],
+            title="Export Timings",
+            initialfile="qr_timings.json"
+        )
+        if filename:
+            try:
+                qr_metrics.export(filename)
+                print(f"Timings exported to {filename}")
+            except OSError as e:
+                messagebox.showerror("Error", f"Error exporting timings: {e}")
 
     def test_domain_detection(self):
         """Test domain detection"""
-        test_inputs = ["playerkomona.top", "google.com", "test.org", "ac.ke", "example.com"]
         print("\n=== DOMAIN DETECTION TEST ===")
-        for test_input in test_inputs:
+        for test_input in DOMAIN_TEST_INPUTS:
             result, input_type = self.detect_input_type(test_input)
             print(f"'{test_input}' -> {input_type}: {result}")
 
@@ -217,6 +380,7 @@ Developed with ❤️ for the community
         self.input_field = tk.Entry(input_frame, font=("Arial", 12), relief=tk.GROOVE, bd=2)
         self.input_field.pack(fill=tk.X, pady=10, ipady=5)
         self.input_field.bind("<Return>", lambda e: self.generate())
+        self.input_field.bind("<KeyRelease>", self.schedule_preview)
         self.input_field.insert(0, "https://github.com")
 
         # Specialized input frames
@@ -240,6 +404,13 @@ Developed with ❤️ for the community
         tk.Label(self.wifi_frame, text="Password:", bg=self.bg_color, font=("Arial", 10)).pack(side=tk.LEFT, padx=(10,0))
         self.password_entry = tk.Entry(self.wifi_frame, font=("Arial", 10), width=15, show="*")
         self.password_entry.pack(side=tk.LEFT)
+        tk.Label(self.wifi_frame, text="Security:", bg=self.bg_color, font=("Arial", 10)).pack(side=tk.LEFT, padx=(10,0))
+        security_box = ttk.Combobox(self.wifi_frame, textvariable=self.wifi_security, values=WIFI_SECURITY_CHOICES,
+                                    state="readonly", width=9)
+        security_box.pack(side=tk.LEFT, padx=5)
+        security_box.bind("<<ComboboxSelected>>", self.schedule_preview)
+        tk.Checkbutton(self.wifi_frame, text="Hidden", variable=self.wifi_hidden, bg=self.bg_color,
+                       command=self.schedule_preview).pack(side=tk.LEFT)
 
         # vCard frame
         self.vcard_frame = tk.Frame(parent, bg=self.bg_color)
@@ -252,6 +423,14 @@ Developed with ❤️ for the community
         tk.Label(self.vcard_frame, text="Email:", bg=self.bg_color, font=("Arial", 10)).pack(side=tk.LEFT, padx=(5,0))
         self.vcard_email = tk.Entry(self.vcard_frame, font=("Arial", 10), width=20)
         self.vcard_email.pack(side=tk.LEFT, padx=2)
+        tk.Label(self.vcard_frame, text="Version:", bg=self.bg_color, font=("Arial", 10)).pack(side=tk.LEFT, padx=(5,0))
+        version_box = ttk.Combobox(self.vcard_frame, textvariable=self.vcard_version, values=["3.0", "4.0"],
+                                   state="readonly", width=4)
+        version_box.pack(side=tk.LEFT, padx=2)
+        version_box.bind("<<ComboboxSelected>>", self.schedule_preview)
+
+        for entry in (self.ssid_entry, self.password_entry, self.vcard_name, self.vcard_phone, self.vcard_email):
+            entry.bind("<KeyRelease>", self.schedule_preview)
 
     def setup_action_buttons(self):
         """Setup action buttons"""
@@ -290,6 +469,10 @@ Developed with ❤️ for the community
 
     def setup_settings_tab(self):
         """Setup customization settings"""
+        from qr_png import COMPRESSION
+        from qr_render import ERROR_LEVELS
+        from qr_vector import VECTOR_FORMATS
+
         # Colors
         color_frame = tk.LabelFrame(self.settings_frame, text="🎨 Colors", 
                                    font=("Arial", 11, "bold"), padx=10, pady=10)
@@ -309,13 +492,71 @@ Developed with ❤️ for the community
         logo_frame.pack(fill=tk.X, padx=10, pady=5)
 
         tk.Label(logo_frame, text="Logo Size (%):", font=("Arial", 10)).pack(side=tk.LEFT)
-        self.logo_size = tk.IntVar(value=25)
         tk.Scale(logo_frame, from_=10, to=40, variable=self.logo_size, 
                 orient=tk.HORIZONTAL, length=150).pack(side=tk.LEFT, padx=10)
 
-        self.logo_status = tk.Label(logo_frame, text="No logo selected", font=("Arial", 9), fg="gray")
+        if self.logo_path:
+            self.logo_status = tk.Label(logo_frame, text=f"Logo: {os.path.basename(self.logo_path)}",
+                                        font=("Arial", 9), fg="green")
+        else:
+            self.logo_status = tk.Label(logo_frame, text="No logo selected", font=("Arial", 9), fg="gray")
         self.logo_status.pack(pady=5)
 
+        # Encoding
+        encode_frame = tk.LabelFrame(self.settings_frame, text="🧮 Encoding", 
+                                    font=("Arial", 11, "bold"), padx=10, pady=10)
+        encode_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        tk.Label(encode_frame, text="Error correction:", font=("Arial", 10)).pack(side=tk.LEFT)
+        ttk.Combobox(encode_frame, textvariable=self.error_correction, values=["auto", *ERROR_LEVELS],
+                     state="readonly", width=6).pack(side=tk.LEFT, padx=10)
+        tk.Label(encode_frame, text="auto = lowest level that survives the logo",
+                 font=("Arial", 9), fg="gray").pack(side=tk.LEFT)
+
+        # Batch settings
+        batch_frame = tk.LabelFrame(self.settings_frame, text="🔁 Batch Settings", 
+                                   font=("Arial", 11, "bold"), padx=10, pady=10)
+        batch_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        tk.Label(batch_frame, text="Worker processes:", font=("Arial", 10)).pack(side=tk.LEFT)
+        tk.Spinbox(batch_frame, from_=1, to=64, textvariable=self.batch_workers,
+                   width=5).pack(side=tk.LEFT, padx=10)
+
+        tk.Label(batch_frame, text="Format:", font=("Arial", 10)).pack(side=tk.LEFT)
+        ttk.Combobox(batch_frame, textvariable=self.batch_format, values=["PNG", *VECTOR_FORMATS],
+                     state="readonly", width=6).pack(side=tk.LEFT, padx=10)
+
+        tk.Label(batch_frame, text="Output:", font=("Arial", 10)).pack(side=tk.LEFT)
+        ttk.Combobox(batch_frame, textvariable=self.batch_output, values=["Folder", "ZIP archive"],
+                     state="readonly", width=11).pack(side=tk.LEFT, padx=10)
+
+        tk.Label(batch_frame, text="Verify:", font=("Arial", 10)).pack(side=tk.LEFT)
+        ttk.Combobox(batch_frame, textvariable=self.batch_verify, values=list(VERIFY_SHARES),
+                     state="readonly", width=5).pack(side=tk.LEFT, padx=10)
+
+        # Output size vs. encode time
+        output_frame = tk.LabelFrame(self.settings_frame, text="🗜️ Output", 
+                                    font=("Arial", 11, "bold"), padx=10, pady=10)
+        output_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        tk.Label(output_frame, text="PNG compression:", font=("Arial", 10)).pack(side=tk.LEFT)
+        ttk.Combobox(output_frame, textvariable=self.png_compression, values=list(COMPRESSION),
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=10)
+        tk.Checkbutton(output_frame, text="1 px per module, no border (for scaling later)",
+                       variable=self.unscaled, command=self.schedule_preview).pack(side=tk.LEFT)
+
+        # Several sizes/formats per code, used by Save QR and batch
+        export_frame = tk.LabelFrame(self.settings_frame, text="📐 Export Sizes", 
+                                    font=("Arial", 11, "bold"), padx=10, pady=10)
+        export_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        tk.Label(export_frame, text="Sizes (px):", font=("Arial", 10)).pack(side=tk.LEFT)
+        tk.Entry(export_frame, textvariable=self.export_sizes, width=16).pack(side=tk.LEFT, padx=10)
+        tk.Label(export_frame, text="Formats:", font=("Arial", 10)).pack(side=tk.LEFT)
+        tk.Entry(export_frame, textvariable=self.export_formats, width=16).pack(side=tk.LEFT, padx=10)
+        tk.Label(export_frame, text="e.g. 350, 512, 2048 and PNG, WEBP, JPEG; empty = one file",
+                 font=("Arial", 9), fg="gray").pack(side=tk.LEFT)
+
     def setup_history_tab(self):
         """Setup history tab"""
         controls = tk.Frame(self.history_frame)
@@ -326,8 +567,19 @@ Developed with ❤️ for the community
         tk.Button(controls, text="Clear History", command=self.clear_history,
                  font=("Arial", 9)).pack(side=tk.LEFT, padx=2)
 
-        self.history_listbox = tk.Listbox(self.history_frame, font=("Arial", 10))
-        self.history_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.history_search = tk.Entry(controls, font=("Arial", 10), width=30)
+        self.history_search.pack(side=tk.RIGHT, padx=2)
+        self.history_search.bind("<KeyRelease>", lambda e: self.refresh_history())
+        tk.Label(controls, text="Search:", font=("Arial", 9)).pack(side=tk.RIGHT)
+
+        list_frame = tk.Frame(self.history_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.history_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL)
+        self.history_listbox = tk.Listbox(list_frame, font=("Arial", 10),
+                                          yscrollcommand=self.on_history_scroll)
+        self.history_scrollbar.config(command=self.history_listbox.yview)
+        self.history_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.refresh_history()
 
     # ... (Keep all your existing methods from the previous version: 
@@ -337,104 +589,93 @@ Developed with ❤️ for the community
     # These remain exactly the same as in the previous working version
 
     def detect_input_type(self, user_input):
-        user_input = user_input.strip()
-        original_input = user_input
-
-        domain_pattern = r'^[a-zA-Z0-9][a-zA-Z0-9.-]*\.[a-zA-Z]{2,}$'
-        if re.match(domain_pattern, user_input, re.IGNORECASE) and ' ' not in user_input:
-            return f"https://{user_input}", "website"
-
-        if user_input.startswith(('http://', 'https://')):
-            return user_input, "website"
-
-        if user_input.startswith('www.'):
-            return f"https://{user_input}", "website"
-
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if re.match(email_pattern, user_input, re.IGNORECASE):
-            return f"mailto:{user_input}", "email"
-
-        phone_pattern = r'^[\+]?[0-9\s\-\(\)]{10,}$'
-        clean_phone = re.sub(r'[\s\-\(\)]', '', user_input)
-        if re.match(phone_pattern, user_input) and len(clean_phone) >= 10:
-            return f"tel:{clean_phone}", "phone"
+        return detect_input_type(user_input)
+
+    def render_options(self):
+        """Current customization settings as render options"""
+        from qr_render import RenderOptions
+
+        return RenderOptions(
+            fg_color=self.qr_fg_color,
+            bg_color=self.qr_bg_color,
+            logo_path=self.logo_path,
+            logo_size=self.logo_size.get(),
+            error_correction=self.error_correction.get(),
+            compression=self.png_compression.get(),
+            **({"box_size": 1, "border": 0} if self.unscaled.get() else {}),
+        )
 
-        if user_input.startswith('@'):
-            handle = user_input[1:]
-            return f"https://instagram.com/{handle}", "social media"
+    def payload_template(self):
+        """Template for batch rows on the WiFi and vCard tabs: columns named after the fields"""
+        from qr_templates import PayloadTemplate
 
-        return original_input, "text"
+        qr_type = self.qr_type.get()
+        if qr_type == "wifi":
+            return PayloadTemplate("wifi", security=self.wifi_security.get(), hidden=self.wifi_hidden.get())
+        if qr_type == "vcard":
+            return PayloadTemplate("vcard", version=self.vcard_version.get())
+        return None
 
-    def generate(self):
+    def read_payload(self, warn=True):
+        """Build the payload from the input widgets, or None if something is missing"""
         qr_type = self.qr_type.get()
         
         if qr_type == "wifi":
             ssid = self.ssid_entry.get().strip()
             password = self.password_entry.get().strip()
             if not ssid:
-                messagebox.showwarning("Input Required", "Please enter WiFi SSID")
-                return
-            data = f"WIFI:S:{ssid};T:WPA;P:{password};;"
-            input_type = "wifi"
+                if warn:
+                    messagebox.showwarning("Input Required", "Please enter WiFi SSID")
+                return None
+            try:
+                return wifi_payload(ssid, password, self.wifi_security.get(), self.wifi_hidden.get()), "wifi"
+            except ValueError as e:
+                if warn:
+                    messagebox.showwarning("Input Required", str(e))
+                return None
             
-        elif qr_type == "vcard":
+        if qr_type == "vcard":
             name = self.vcard_name.get().strip()
             phone = self.vcard_phone.get().strip()
             email = self.vcard_email.get().strip()
             if not name:
-                messagebox.showwarning("Input Required", "Please enter name for vCard")
-                return
-            data = f"BEGIN:VCARD\nVERSION:3.0\nFN:{name}\nTEL:{phone}\nEMAIL:{email}\nEND:VCARD"
-            input_type = "vcard"
+                if warn:
+                    messagebox.showwarning("Input Required", "Please enter name for vCard")
+                return None
+            return vcard_payload(name, phone, email, self.vcard_version.get()), "vcard"
             
-        else:
-            user_input = self.input_field.get().strip()
-            if not user_input:
+        user_input = self.input_field.get().strip()
+        if not user_input:
+            if warn:
                 messagebox.showwarning("Input Required", "Please enter content for QR code")
-                return
-            data, input_type = self.detect_input_type(user_input)
+            return None
+        return self.detect_input_type(user_input)
+
+    def generate(self):
+        payload = self.read_payload()
+        if payload is None:
+            return
+        data, input_type = payload
 
         try:
             self.current_qr_data = data
             display_data = data if len(data) < 60 else data[:57] + "..."
             self.info_label.config(text=f"Type: {input_type.title()} | Content: {display_data}", fg="#4CAF50")
 
-            qr = qrcode.QRCode(
-                version=None,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill_color=self.qr_fg_color, back_color=self.qr_bg_color).convert("RGB")
-
-            if self.logo_path:
-                try:
-                    logo = Image.open(self.logo_path)
-                    logo_size = min(img.size) * self.logo_size.get() // 100
-                    logo = ImageOps.contain(logo, (logo_size, logo_size))
-                    
-                    mask = Image.new('L', logo.size, 0)
-                    draw = ImageDraw.Draw(mask)
-                    draw.ellipse((0, 0, logo.size[0], logo.size[1]), fill=255)
-                    
-                    pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
-                    img.paste(logo, pos, mask=mask)
-                except Exception as e:
-                    print(f"Logo error: {e}")
-
-            img_display = img.copy()
-            img_display.thumbnail((350, 350), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img_display)
-
-            self.qr_label.config(image=photo, text="")
-            self.qr_label.image = photo
-            self.current_qr_image = img
+            self.current_qr_options = self.render_options()
+            self.current_qr_image = self.render_cache.render(data, self.current_qr_options)
+            self.start_preview(started=time.perf_counter())
             
-            self.save_to_history(data, input_type)
+            try:
+                self.save_to_history(data, input_type)
+            except Exception as e:
+                # the code is already shown: a locked or broken history database is not a failed render
+                self.logger.warning("Could not save to history: %s", e)
             print(f"✓ Generated {input_type} QR code")
+            if self.current_qr_options.error_correction == "auto":
+                from qr_profile import choose_profile
+
+                print(f"  Encode profile: {choose_profile(data, self.current_qr_options).report()}")
 
         except Exception as e:
             error_msg = f"Error generating QR code: {e}"
@@ -442,37 +683,145 @@ Developed with ❤️ for the community
             messagebox.showerror("Error", error_msg)
             self.info_label.config(text="Error generating QR code", fg="#f44336")
 
+    def schedule_preview(self, event=None):
+        """Debounce live preview updates while the user is typing"""
+        if self.preview_after:
+            self.root.after_cancel(self.preview_after)
+        self.preview_after = self.root.after(PREVIEW_DELAY_MS, self.start_preview, time.perf_counter())
+
+    def start_preview(self, started):
+        """Hand the current input to the background preview worker"""
+        self.preview_after = None
+        payload = self.read_payload(warn=False)
+        if payload is None:
+            return
+
+        self.preview_generation += 1
+        if self.preview_future:
+            self.preview_future.cancel()
+        self.preview_future = self.preview_executor.submit(
+            self.render_preview_job, self.preview_generation, payload[0], self.render_options(), started)
+        if not self.preview_polling:
+            self.preview_polling = True
+            self.root.after(PREVIEW_POLL_MS, self.poll_preview)
+
+    def render_preview_job(self, generation, data, options, started):
+        """Runs on the preview worker thread; never touches Tk"""
+        if generation != self.preview_generation:
+            return
+        from qr_render import render_preview
+
+        begin = time.perf_counter()
+        try:
+            img = render_preview(data, options, PREVIEW_SIZE)
+        except Exception as e:
+            img = e
+        self.preview_queue.put((generation, img, time.perf_counter() - begin, started))
+
+    def poll_preview(self):
+        """Pick up finished previews on the Tk thread, dropping stale ones"""
+        while True:
+            try:
+                generation, img, render_time, started = self.preview_queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.preview_generation:
+                self.show_preview(img, render_time, started)
+
+        if (self.preview_future and not self.preview_future.done()) or not self.preview_queue.empty():
+            self.root.after(PREVIEW_POLL_MS, self.poll_preview)
+        else:
+            self.preview_polling = False
+
+    def show_preview(self, img, render_time, started):
+        if isinstance(img, Exception):
+            self.qr_label.config(image="", text=f"Preview unavailable: {img}")
+            self.qr_label.image = None
+            return
+
+        from PIL import ImageTk
+
+        with qr_metrics.timed("thumbnail"):
+            photo = ImageTk.PhotoImage(img)
+        self.qr_label.config(image=photo, text="")
+        self.qr_label.image = photo
+
+        latency = time.perf_counter() - started
+        self.preview_latencies.append(latency)
+        if hasattr(self, "preview_stats_label"):
+            average = sum(self.preview_latencies) / len(self.preview_latencies)
+            self.preview_stats_label.config(
+                text=f"Preview latency: last {latency * 1000:.0f} ms "
+                     f"(render {render_time * 1000:.0f} ms, debounce {PREVIEW_DELAY_MS} ms), "
+                     f"avg {average * 1000:.0f} ms over {len(self.preview_latencies)}")
+
     def save_to_history(self, data, qr_type):
         history_item = {
             "data": data,
             "type": qr_type,
             "timestamp": datetime.now().isoformat()
         }
-        self.history.insert(0, history_item)
-        self.history = self.history[:10]
-        self.save_history()
-        self.refresh_history()
+        with qr_metrics.timed("history"):
+            history_item["id"] = self.get_history_store().add(data, qr_type, history_item["timestamp"])
+        if hasattr(self, "history_listbox") and not self.history_search.get().strip():
+            self.history.insert(0, history_item)
+            self.history_listbox.insert(0, self.history_label(history_item))
 
     def load_history(self):
-        try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    self.history = json.load(f)
-        except:
-            self.history = []
+        """Prepare the history database on a background thread"""
+        self.history_store = None
+        self.history_loader = threading.Thread(target=self.prepare_history, daemon=True)
+        self.history_loader.start()
+
+    def prepare_history(self):
+        """Create the schema and import the old JSON history once, off the Tk thread"""
+        from qr_history import HistoryStore
 
-    def save_history(self):
+        store = HistoryStore(self.history_db)
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.history, f, indent=2)
-        except:
-            pass
+            migrated = store.migrate_json(self.history_file)
+        finally:
+            store.close()
+        if migrated:
+            self.logger.info(f"Imported {migrated} entries from {self.history_file}")
+        self.mark_startup("history ready")
+
+    def get_history_store(self):
+        """The Tk thread's own connection, opened once the loader has finished"""
+        if self.history_store is None:
+            from qr_history import HistoryStore
+
+            self.history_loader.join()
+            self.history_store = HistoryStore(self.history_db)
+        return self.history_store
+
+    def history_label(self, item):
+        when = item['timestamp'][:16].replace('T', ' ')
+        return f"{when}  {item['type']}: {item['data'][:40]}..."
 
     def refresh_history(self):
+        """Reload the history list from the first page"""
+        self.history = []
+        self.history_exhausted = False
         self.history_listbox.delete(0, tk.END)
-        for i, item in enumerate(self.history):
-            display_text = f"{i+1}. {item['type']}: {item['data'][:40]}..."
-            self.history_listbox.insert(tk.END, display_text)
+        self.load_history_page()
+
+    def load_history_page(self):
+        """Append the next page of history rows to the list"""
+        query = self.history_search.get().strip() or None
+        before = self.history[-1] if self.history else None
+        rows = self.get_history_store().page(HISTORY_PAGE_SIZE, before=before, query=query)
+        if len(rows) < HISTORY_PAGE_SIZE:
+            self.history_exhausted = True
+        self.history.extend(rows)
+        for item in rows:
+            self.history_listbox.insert(tk.END, self.history_label(item))
+
+    def on_history_scroll(self, first, last):
+        """Scrollbar callback that loads more rows as the end comes into view"""
+        self.history_scrollbar.set(first, last)
+        if float(last) > 0.9 and not self.history_exhausted:
+            self.load_history_page()
 
     def load_from_history(self):
         selection = self.history_listbox.curselection()
@@ -483,30 +832,142 @@ Developed with ❤️ for the community
             self.notebook.select(0)
 
     def clear_history(self):
-        self.history = []
-        self.save_history()
+        if not messagebox.askyesno("Clear History", "Delete all history entries?"):
+            return
+        self.get_history_store().clear()
         self.refresh_history()
 
+    def export_variants(self, default_format):
+        """Variants from the Export Sizes settings, () for a single file, or None if invalid"""
+        sizes, formats = self.export_sizes.get().strip(), self.export_formats.get().strip()
+        if not sizes and not formats:
+            return ()
+        from qr_fanout import parse_variants
+
+        try:
+            return tuple(parse_variants(sizes, formats or default_format))
+        except ValueError as e:
+            messagebox.showerror("Export Sizes", str(e))
+            return None
+
     def batch_generate(self):
-        text = simpledialog.askstring("Batch Generate", "Enter multiple items (one per line):")
-        if text:
-            items = [item.strip() for item in text.split('\n') if item.strip()]
-            folder = filedialog.askdirectory(title="Select folder to save batch QR codes")
-            if folder:
-                success_count = 0
-                for i, item in enumerate(items):
-                    try:
-                        data, input_type = self.detect_input_type(item)
-                        qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_H)
-                        qr.add_data(data)
-                        qr.make(fit=True)
-                        img = qr.make_image(fill_color=self.qr_fg_color, back_color=self.qr_bg_color)
-                        filename = f"qr_batch_{i+1:02d}.png"
-                        img.save(os.path.join(folder, filename))
-                        success_count += 1
-                    except Exception as e:
-                        print(f"Batch error for '{item}': {e}")
-                messagebox.showinfo("Batch Complete", f"Generated {success_count} QR codes!")
+        variants = self.export_variants(self.batch_format.get())
+        if variants is None:
+            return
+        text = simpledialog.askstring("Batch Generate", "Enter multiple items (one per line),\n"
+                                                        "or leave empty to read them from a file:")
+        if text is None:
+            return
+        if text.strip():
+            source = [item.strip() for item in text.split('\n') if item.strip()]
+            total = len(source)
+        else:
+            # Files are streamed row by row, so their size doesn't matter. On the
+            # WiFi and vCard tabs their columns (ssid, password, security, hidden /
+            # name, phone, email, org, ...) fill in the payload, see qr_templates
+            source = filedialog.askopenfilename(
+                title="Batch input (one item per line, CSV or JSONL)",
+                filetypes=[("Text, CSV or JSONL", "*.txt;*.csv;*.jsonl;*.ndjson"), ("All files", "*.*")])
+            total = None
+        if source:
+            archive = self.batch_output.get() == "ZIP archive"
+            if archive:
+                target = filedialog.asksaveasfilename(
+                    title="Save batch QR codes as", defaultextension=".zip",
+                    filetypes=[("ZIP archive", "*.zip"), ("TAR archive", "*.tar;*.tar.gz;*.tgz")])
+            else:
+                target = filedialog.askdirectory(title="Select folder to save batch QR codes")
+            if target:
+                from qr_vector import VECTOR_FORMATS
+
+                options = self.render_options()
+                self.batch_queue = queue.Queue()
+                ext = VECTOR_FORMATS.get(self.batch_format.get(), ".png")
+                self.batch_summary = ""
+                threading.Thread(target=self.run_batch_worker, daemon=True,
+                                 args=(source, total, options, target, self.batch_workers.get(), ext, archive,
+                                       variants, VERIFY_SHARES[self.batch_verify.get()],
+                                       self.payload_template() if total is None else None)).start()
+                self.info_label.config(text=f"Batch: 0/{total or '?'}", fg="#9C27B0")
+                self.root.after(100, self.poll_batch, total, 0, 0)
+
+    def run_batch_worker(self, source, total, options, target, workers, ext, archive=False, variants=(),
+                         verify=0.0, template=None):
+        """Background thread feeding batch results to the GUI.
+
+        ``source`` is a list of items or the path of an input file. Either way
+        the scheduler reads it lazily and keeps rendered images within its
+        memory budget, spilling to disk if the archive writer falls behind.
+        ``verify`` is the share of codes the workers decode after rendering.
+        ``template`` builds WiFi/vCard payloads from the rows of a file.
+        """
+        from dataclasses import replace
+
+        from qr_archive import ArchiveWriter, default_template
+        from qr_batch import BatchJob, sampled
+        from qr_cli import detect_format, read_rows
+        from qr_scheduler import BatchScheduler
+
+        stream = None
+        try:
+            if isinstance(source, str):
+                stream = open(source, newline="", encoding="utf-8-sig")
+                rows = read_rows(stream, detect_format(source))
+            else:
+                rows = ({"data": item} for item in source)
+            filename = default_template(total, ext)
+            folder = "" if archive else target
+            jobs = (BatchJob(index, row, options, os.path.join(folder, filename.format(index=index)),
+                             keep_bytes=archive, variants=tuple(variants), verify=sampled(index, verify),
+                             template=template)
+                    for index, row in enumerate(rows, start=1))
+            scheduler = BatchScheduler(workers=workers)
+            if archive:
+                with ArchiveWriter(target) as writer:
+                    def write(result):
+                        writer.add(result)
+                        # the GUI only needs the outcome, not the image bytes
+                        self.batch_queue.put(replace(result, data=None, outputs=None))
+
+                    stats = scheduler.run(jobs, write)
+            else:
+                stats = scheduler.run(jobs, self.batch_queue.put)
+            self.batch_summary = "\n".join(filter(None, (stats.output_report(), stats.verify_report())))
+            print(f"Batch output: {stats.output_report()}")
+            if stats.verified:
+                print(stats.verify_report())
+            print(f"Batch memory: {stats.memory_report()}")
+        except Exception as e:
+            self.batch_queue.put(e)
+        finally:
+            if stream is not None:
+                stream.close()
+        self.batch_queue.put(None)
+
+    def poll_batch(self, total, done, success_count):
+        """Drain finished batch items without blocking the event loop"""
+        while True:
+            try:
+                result = self.batch_queue.get_nowait()
+            except queue.Empty:
+                break
+            if result is None:
+                self.info_label.config(text=f"Batch complete: {success_count}/{total or done}", fg="#4CAF50")
+                messagebox.showinfo("Batch Complete", f"Generated {success_count} QR codes!\n{self.batch_summary}")
+                return
+            if isinstance(result, Exception):
+                print(f"Batch error: {result}")
+                continue
+            done += 1
+            if result.ok:
+                success_count += 1
+            else:
+                print(f"Batch error for '{result.item}': {result.error}")
+            if result.verified is False:
+                print(f"✗ '{result.item}' won't scan: {result.verify_detail}")
+
+        self.info_label.config(text=f"Batch: {done}/{total or '?'}")
+        self.root.after(100, self.poll_batch, total, done, success_count)
 
     def choose_logo(self):
         path = filedialog.askopenfilename(
@@ -515,7 +976,9 @@ Developed with ❤️ for the community
         )
         if path:
             self.logo_path = path
-            self.logo_status.config(text=f"Logo: {os.path.basename(path)}", fg="green")
+            if hasattr(self, "logo_status"):
+                self.logo_status.config(text=f"Logo: {os.path.basename(path)}", fg="green")
+            self.schedule_preview()
 
     def save_qr_code(self):
         if not self.current_qr_image:
@@ -531,19 +994,47 @@ Developed with ❤️ for the community
 
             filename = filedialog.asksaveasfilename(
                 defaultextension=".png",
-                filetypes=[("PNG files", "*.png"), ("All files", "*.*")],
+                filetypes=[("PNG files", "*.png"), ("WebP", "*.webp"), ("JPEG", "*.jpg;*.jpeg"),
+                           ("SVG vector", "*.svg"), ("PDF vector", "*.pdf"), ("EPS vector", "*.eps"),
+                           ("All files", "*.*")],
                 title="Save QR Code",
                 initialfile=default_name
             )
 
             if filename:
-                self.current_qr_image.save(filename)
+                from qr_render import format_for_path
+
+                fmt = format_for_path(filename)
+                variants = self.export_variants(fmt)
+                if variants is None:
+                    return
+                if variants:
+                    self.save_variants(filename, variants)
+                    return
+                # Rasters come out as 1-bit/palette PNGs and the like (see qr_png)
+                with open(filename, "wb") as f:
+                    f.write(self.render_cache.render_bytes(self.current_qr_data, self.current_qr_options, fmt))
                 messagebox.showinfo("Success", f"QR code saved as:\n{filename}")
 
         except Exception as e:
             messagebox.showerror("Error", f"Error saving QR code: {e}")
 
+    def save_variants(self, filename, variants):
+        """Encode the current code once and write every export size/format next to ``filename``"""
+        from qr_fanout import render_variants, variant_path
+
+        saved = []
+        for output in render_variants(self.current_qr_data, self.current_qr_options, variants):
+            path = variant_path(filename, output.variant)
+            with open(path, "wb") as f:
+                f.write(output.data)
+            saved.append(f"{os.path.basename(path)} ({output.pixels}px)")
+        print(f"✓ Saved {len(saved)} files: {', '.join(saved)}")
+        messagebox.showinfo("Success", f"Saved {len(saved)} files in {os.path.dirname(filename)}:\n"
+                            + "\n".join(saved))
+
     def on_type_change(self):
+        self.schedule_preview()
         qr_type = self.qr_type.get()
         self.wifi_frame.pack_forget()
         self.vcard_frame.pack_forget()
@@ -568,14 +1059,20 @@ Developed with ❤️ for the community
         if color:
             self.qr_fg_color = color
             self.fg_btn.config(bg=color, fg="white" if color == "black" else "black")
+            self.schedule_preview()
 
     def choose_bg_color(self):
         color = colorchooser.askcolor(title="Choose Background Color", initialcolor=self.qr_bg_color)[1]
         if color:
             self.qr_bg_color = color
             self.bg_btn.config(bg=color, fg="black" if color == "white" else "white")
+            self.schedule_preview()
 
 def main():
+    if len(sys.argv) > 1:
+        from qr_cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     root = tk.Tk()
     app = QRCodeGenerator(root)
     root.mainloop()
@@ -0,0 +1,187 @@
+"""Streaming ZIP/TAR output and manifests for batch jobs.
+
+Entries are appended to the archive as results arrive from the worker pool,
+so only the images in flight are ever held in memory. The exception is the
+ZIP central directory: zipfile keeps a ZipInfo (about 500 bytes) per entry
+until the archive is closed, while TAR keeps nothing. Manifest rows are
+spooled to a temporary file and added as the last entry when the archive is
+closed.
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+
+MANIFEST_FIELDS = ["index", "input", "entry", "type", "payload_sha256", "bytes", "error",
+                   "verified", "verify_detail"]
+
+VERIFIED = {None: "", True: "yes", False: "no"}
+
+
+def archive_kind(path):
+    """"zip", "tar" or "tar.gz" from the archive's filename"""
+    name = path.lower()
+    if name.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if name.endswith(".tar"):
+        return "tar"
+    if name.endswith(".zip"):
+        return "zip"
+    raise ValueError(f"Unknown archive type for '{path}' (use .zip, .tar or .tar.gz)")
+
+
+def default_template(count=None, ext=".png"):
+    """Filename template whose zero padding keeps entries sorted"""
+    width = max(2, len(str(count))) if count else 6
+    return f"qr_batch_{{index:0{width}d}}{ext}"
+
+
+def manifest_filename(fmt):
+    return "manifest.csv" if fmt == "csv" else "manifest.jsonl"
+
+
+def manifest_row(result):
+    return {
+        "index": result.index,
+        "input": result.item,
+        "entry": result.path if result.ok else "",
+        "type": result.qr_type or "",
+        "payload_sha256": result.payload_hash or "",
+        "bytes": result.size,
+        "error": result.error or "",
+        "verified": VERIFIED[result.verified],
+        "verify_detail": result.verify_detail or "",
+    }
+
+
+def manifest_rows(result):
+    """One row per file: fan-out results (see qr_fanout) get a row per variant,
+    with the verification only on the variant that was decoded"""
+    if not result.outputs:
+        return [manifest_row(result)]
+    rows = []
+    for path, size, _ in result.outputs:
+        row = manifest_row(result)
+        row.update(entry=path, bytes=size)
+        if path != result.verified_path:
+            row.update(verified="", verify_detail="")
+        rows.append(row)
+    return rows
+
+
+class ManifestWriter:
+    """Writes one manifest row per batch result, as CSV or JSON lines.
+
+    ``header=False`` leaves out the CSV header, for appending to a manifest
+    that already has one.
+    """
+
+    def __init__(self, stream, fmt="csv", header=True):
+        self.stream = stream
+        self.fmt = fmt
+        self.csv = None
+        if fmt == "csv":
+            self.csv = csv.DictWriter(stream, fieldnames=MANIFEST_FIELDS)
+            if header:
+                self.csv.writeheader()
+        elif fmt != "json":
+            raise ValueError(f"Unknown manifest format '{fmt}'")
+
+    def add(self, result):
+        for row in manifest_rows(result):
+            if self.csv:
+                self.csv.writerow(row)
+            else:
+                self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class ArchiveWriter:
+    """Append batch results to a ZIP or TAR file as they complete"""
+
+    def __init__(self, path, compress=False, manifest="csv"):
+        self.path = path
+        self.kind = archive_kind(path)
+        self.written = 0
+        self.timestamp = time.time()
+        if self.kind == "zip":
+            self.compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            self.archive = zipfile.ZipFile(path, "w", compression=self.compression, allowZip64=True)
+        else:
+            self.archive = tarfile.open(path, "w:gz" if self.kind == "tar.gz" else "w")
+
+        self.manifest = None
+        if manifest:
+            self.spool = tempfile.TemporaryFile("w+", newline="", encoding="utf-8")
+            self.manifest = ManifestWriter(self.spool, manifest)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_entry(self, name, data):
+        if self.kind == "zip":
+            info = zipfile.ZipInfo(name, time.localtime(self.timestamp)[:6])
+            info.compress_type = self.compression
+            self.archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = self.timestamp
+            self.archive.addfile(info, io.BytesIO(data))
+            # TarFile remembers every member; we never read them back
+            self.archive.members.clear()
+
+    def write_stream(self, name, stream, size):
+        """Copy ``size`` bytes from a binary file into the archive in chunks"""
+        if self.kind == "zip":
+            info = zipfile.ZipInfo(name, time.localtime(self.timestamp)[:6])
+            info.compress_type = self.compression
+            info.file_size = size
+            with self.archive.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as entry:
+                shutil.copyfileobj(stream, entry)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = self.timestamp
+            self.archive.addfile(info, stream)
+            self.archive.members.clear()
+
+    def add(self, result):
+        """Write one BatchResult (its bytes, if it succeeded) and its manifest row"""
+        if result.ok and result.outputs:
+            for path, _, data in result.outputs:
+                self.write_entry(path.replace(os.sep, "/"), data)
+                self.written += 1
+            result.outputs = [(path, size, None) for path, size, _ in result.outputs]
+        elif result.ok and result.data is not None:
+            self.write_entry(result.path.replace(os.sep, "/"), result.data)
+            self.written += 1
+            result.data = None
+        if self.manifest:
+            self.manifest.add(result)
+
+    def close(self):
+        if self.manifest:
+            # streamed, not read back whole: million-row batches have big manifests
+            self.spool.flush()
+            raw = self.spool.buffer
+            size = raw.seek(0, io.SEEK_END)
+            raw.seek(0)
+            self.write_stream(manifest_filename(self.manifest.fmt), raw, size)
+            self.spool.close()
+            self.manifest = None
+        self.archive.close()
+
+
+def write_results(results, writer):
+    """Pass results through, adding each one to ``writer`` on the way"""
+    for result in results:
+        writer.add(result)
+        yield result
@@ -0,0 +1,262 @@
+"""Batch rendering spread across a process pool.
+
+Jobs are grouped into chunks and submitted to a ``ProcessPoolExecutor`` with
+a bounded number of chunks in flight, so arbitrarily long (even streaming)
+inputs never pile up in memory. Each job is rendered and written by the
+worker (or handed back as bytes for archive output, see qr_archive);
+failures are captured per job instead of aborting the whole batch.
+"""
+import hashlib
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from dataclasses import dataclass
+from typing import Optional
+
+import qr_cache
+import qr_metrics
+from qr_decode import verify_image
+from qr_fanout import RASTER_FORMATS, render_variants, variant_path
+from qr_payloads import build_payload
+from qr_render import RenderOptions, format_for_path, render
+from qr_templates import PayloadTemplate
+from qr_vector import VECTOR_FORMATS
+
+DEFAULT_FILENAME = "qr_batch_{index:02d}.png"
+
+
+@dataclass
+class BatchJob:
+    """One item to render: its input fields, render options and output path.
+
+    With ``keep_bytes`` the worker returns the encoded image instead of
+    writing it, and ``path`` is only used as the entry name. With
+    ``variants`` (see qr_fanout) the code is encoded once and every variant
+    is saved next to ``path``, named by qr_fanout.variant_path(). With
+    ``verify`` the worker decodes what it wrote (see qr_decode). With
+    ``template`` (see qr_templates) the payload is built from the row's
+    columns as the template maps them. A job with an ``error`` failed while it
+    was planned and only reports it.
+    """
+    index: int
+    fields: dict
+    options: RenderOptions
+    path: str
+    qr_type: Optional[str] = None
+    keep_bytes: bool = False
+    variants: tuple = ()
+    verify: bool = False
+    template: Optional[PayloadTemplate] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of rendering a single batch job.
+
+    Fan-out jobs list every file in ``outputs`` as ``(path, size, data)``;
+    ``path`` and ``size`` then refer to the first file and the total.
+    ``ms`` is the worker's time for the whole job, writing included.
+    ``verified`` is None for jobs that weren't decoded; for fan-out jobs it
+    applies to the one file in ``verified_path``.
+    """
+    index: int
+    item: str
+    path: Optional[str] = None
+    error: Optional[str] = None
+    qr_type: Optional[str] = None
+    payload_hash: Optional[str] = None
+    size: int = 0
+    data: Optional[bytes] = None
+    outputs: Optional[list] = None
+    ms: float = 0.0
+    verified: Optional[bool] = None
+    verify_detail: Optional[str] = None
+    verified_path: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def sampled(index, rate):
+    """Whether item ``index`` (from 1) is in an evenly spread ``rate`` share of the batch"""
+    return int(index * rate) > int((index - 1) * rate)
+
+
+def describe(fields):
+    """Short label for a job's input, used in progress and error messages"""
+    label = fields.get("data") or fields.get("ssid") or fields.get("name")
+    return label or next((value for value in fields.values() if value), "")
+
+
+def write_output(path, data):
+    """Write ``data`` to ``path`` through a temporary file in the same folder, so an
+    interrupted batch never leaves a cut-off image that --resume would skip"""
+    tmp = f"{path}.{os.getpid()}.part"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def render_job(job):
+    """Build the payload for one job, render it and save it"""
+    started = time.perf_counter()
+    result = _render_job(job)
+    result.ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+def _render_job(job):
+    if job.error is not None:
+        return BatchResult(job.index, describe(job.fields), error=job.error)
+    try:
+        with qr_metrics.timed("payload"):
+            data, input_type = build_payload(job.fields, job.qr_type, job.template)
+        if job.variants:
+            return render_variants_job(job, data, input_type)
+        fmt = format_for_path(job.path)
+        image = qr_cache.default_cache().render_bytes(data, job.options, fmt)
+        if not job.keep_bytes:
+            with qr_metrics.timed("write"):
+                write_output(job.path, image)
+        result = BatchResult(
+            job.index, describe(job.fields), path=job.path, qr_type=input_type,
+            payload_hash=hashlib.sha256(data.encode("utf-8")).hexdigest(), size=len(image),
+            data=image if job.keep_bytes else None,
+        )
+        if job.verify:
+            result.verified, result.verify_detail = verify_output(data, job.options, fmt, image)
+        return result
+    except Exception as e:
+        return BatchResult(job.index, describe(job.fields), error=str(e))
+
+
+def render_variants_job(job, data, input_type):
+    outputs = []
+    hardest = None  # the variant most likely to fail a scan, checked when verifying
+    for output in render_variants(data, job.options, job.variants, workers=1):
+        path = variant_path(job.path, output.variant)
+        if not job.keep_bytes:
+            with qr_metrics.timed("write"):
+                write_output(path, output.data)
+        outputs.append((path, len(output.data), output.data if job.keep_bytes else None))
+        if output.variant.format in RASTER_FORMATS:
+            # the fewest pixels per module, lossy JPEG first
+            key = (output.pixels, output.variant.format != "JPEG")
+            if hardest is None or key < hardest[0]:
+                hardest = (key, output.variant.format, output.data, path)
+    result = BatchResult(
+        job.index, describe(job.fields), path=outputs[0][0], qr_type=input_type,
+        payload_hash=hashlib.sha256(data.encode("utf-8")).hexdigest(),
+        size=sum(size for _, size, _ in outputs), outputs=outputs,
+    )
+    if job.verify:
+        if hardest is None:
+            hardest = (None, job.variants[0].format, None, outputs[0][0])
+        fmt, image, result.verified_path = hardest[1:]
+        result.verified, result.verify_detail = verify_output(data, job.options, fmt, image)
+    return result
+
+
+def verify_output(data, options, fmt, image):
+    """Decode a rendered file and check it reads back as ``data``.
+
+    Vector files can't be rasterized here, so an equivalent raster render
+    is decoded in their place.
+    """
+    from PIL import Image
+
+    with qr_metrics.timed("verify"):
+        if fmt in VECTOR_FORMATS:
+            img = render(data, options)
+        else:
+            img = Image.open(io.BytesIO(image))
+        return verify_image(img, data)
+
+
+def _init_worker(cache_bytes, cache_dir, metrics):
+    qr_cache.configure(cache_bytes, cache_dir)
+    qr_metrics.enable(metrics)
+
+
+def _render_chunk(chunk):
+    """Results for a chunk, plus the worker's stage timings since the last chunk"""
+    return [render_job(job) for job in chunk], qr_metrics.drain()
+
+
+def _chunks(jobs, chunk_size):
+    jobs = iter(jobs)
+    while True:
+        chunk = list(itertools.islice(jobs, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_jobs(jobs, workers=None, chunk_size=16, cache_bytes=qr_cache.DEFAULT_MAX_BYTES, cache_dir=None,
+             max_pending=None):
+    """Render ``jobs``, yielding a BatchResult per job.
+
+    Results are yielded as chunks complete, so callers can report progress
+    while the batch is running. ``workers=1`` renders in-process. Every
+    worker gets a render cache of ``cache_bytes``; ``cache_dir`` adds a disk
+    tier shared by all of them. When qr_metrics is enabled, the workers'
+    stage timings are merged into this process as chunks complete.
+
+    At most ``max_pending`` chunks (two per worker by default) are queued or
+    rendering at once; it may be a callable, asked again before every
+    submission, so a scheduler can tighten it as results grow.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(jobs, chunk_size)
+
+    if workers == 1:
+        qr_cache.configure(cache_bytes, cache_dir)
+        for chunk in chunks:
+            yield from (render_job(job) for job in chunk)
+        return
+
+    def collect(future):
+        results, timings = future.result()
+        qr_metrics.merge(timings)
+        return results
+
+    max_pending = max_pending or workers * 2
+    limit = max_pending if callable(max_pending) else lambda: max_pending
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_bytes, cache_dir, qr_metrics.enabled())) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_render_chunk, chunk))
+            while pending and len(pending) >= limit():
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from collect(future)
+        for future in as_completed(pending):
+            yield from collect(future)
+
+
+def run_batch(items, options, folder, workers=None, chunk_size=16, filename=DEFAULT_FILENAME,
+              keep_bytes=False, variants=(), verify=0.0, **cache):
+    """Render plain text ``items`` into ``folder`` with shared options.
+
+    With ``keep_bytes`` nothing is written; results carry the image bytes
+    for an ArchiveWriter and ``folder`` is only prefixed to entry names.
+    ``variants`` fans every item out to several sizes and formats.
+    ``verify`` is the share of items decoded after rendering (1 = all).
+    """
+    jobs = (
+        BatchJob(index, {"data": item}, options, os.path.join(folder, filename.format(index=index)),
+                 keep_bytes=keep_bytes, variants=tuple(variants), verify=sampled(index, verify))
+        for index, item in enumerate(items, start=1)
+    )
+    return run_jobs(jobs, workers=workers, chunk_size=chunk_size, **cache)
@@ -0,0 +1,153 @@
+"""Content-addressed cache for rendered QR images.
+
+Entries are keyed by a hash of the payload plus every render option (and the
+logo file's size and mtime), and hold the encoded image bytes. The first tier
+is an in-memory LRU bounded in bytes; the optional second tier is a directory
+of files shared between processes and runs.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+
+from PIL import Image
+
+from qr_render import RenderOptions, render_bytes
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_key(data, options, format="PNG"):
+    """Stable hash of everything that affects the encoded output"""
+    fields = asdict(options)
+    if options.logo_path:
+        try:
+            stat = os.stat(options.logo_path)
+            fields["logo_stat"] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            fields["logo_stat"] = None
+    blob = json.dumps([data, format.upper(), fields], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Two-tier (memory LRU + optional disk) cache of encoded renders"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return cached bytes for ``key`` or None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.directory:
+            try:
+                with open(self.disk_path(key), "rb") as f:
+                    value = f.read()
+            except OSError:
+                value = None
+            if value is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                self.remember(key, value)
+                return value
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def remember(self, key, value):
+        """Store ``value`` in the memory tier, evicting least recently used entries"""
+        if len(value) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def put(self, key, value):
+        self.remember(key, value)
+        if self.directory:
+            path = self.disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp, path)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def render_bytes(self, data, options=None, format="PNG"):
+        """Encoded image for ``data``, rendered only on a cache miss"""
+        options = options or RenderOptions()
+        key = cache_key(data, options, format)
+        value = self.get(key)
+        if value is None:
+            value = render_bytes(data, options, format)
+            self.put(key, value)
+        return value
+
+    def render(self, data, options=None):
+        """Like qr_render.render(), but served from the cache when possible"""
+        img = Image.open(io.BytesIO(self.render_bytes(data, options)))
+        img.load()
+        return img
+
+
+_default_cache = None
+
+
+def configure(max_bytes=DEFAULT_MAX_BYTES, directory=None):
+    """Replace the process-wide cache (also used as a pool initializer)"""
+    global _default_cache
+    _default_cache = RenderCache(max_bytes, directory)
+    return _default_cache
+
+
+def default_cache():
+    """The process-wide cache, created on first use"""
+    if _default_cache is None:
+        configure()
+    return _default_cache
@@ -0,0 +1,353 @@
+"""Command-line interface: ``python nmqr.py batch ...``
+
+Items are streamed from stdin, a text file, a CSV file or a JSONL file and
+written as they are rendered (to a folder, or straight into a ZIP/TAR archive
+with ``--archive``), so memory use does not grow with the input.
+
+Each row may override the defaults given on the command line:
+
+    data, type, fg, bg, filename            (all inputs)
+    ssid, password, security, hidden        (type=wifi)
+    name, phone, email, org, ...            (type=vcard, see qr_templates)
+
+With ``--map`` (and ``--type wifi`` or ``vcard``) the WiFi or vCard fields
+come from any columns instead, e.g. ``--map "name={First} {Last}"
+--map phone=Mobile``; see qr_templates for the fields.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from dataclasses import replace
+from string import Formatter
+
+import qr_metrics
+from qr_payloads import build_payload, text_fields
+from qr_templates import VCARD_VERSIONS, PayloadTemplate, compile_template, parse_fields
+
+# The render stack (qrcode, Pillow, NumPy, the process pool) is imported by
+# the commands that need it, so --help and argument errors start instantly.
+
+DEFAULT_TEMPLATE = "qr_{index:06d}.png"
+ERROR_CHOICES = ["auto", "L", "M", "Q", "H"]
+COMPRESSION_CHOICES = ["fast", "default", "small"]  # qr_png.COMPRESSION
+SECURITY_CHOICES = ["WPA", "SAE", "WEP", "nopass"]
+
+
+def read_lines(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield {"data": line}
+
+
+def read_csv(stream, column):
+    for row in csv.DictReader(stream):
+        if column != "data" and column in row:
+            row["data"] = row.pop(column)
+        yield row
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
+        # numbers (SKUs, phone numbers) and booleans as strings, like CSV cells
+        yield text_fields(row) if isinstance(row, dict) else {"data": str(row)}
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ext, "lines")
+
+
+def read_rows(stream, fmt, column="data"):
+    """Yield one dict of fields per input row"""
+    if fmt == "csv":
+        return read_csv(stream, column)
+    if fmt == "jsonl":
+        return read_jsonl(stream)
+    return read_lines(stream)
+
+
+def row_options(base, row):
+    """Apply per-row color overrides to the base render options"""
+    overrides = {}
+    if row.get("fg"):
+        overrides["fg_color"] = row["fg"]
+    if row.get("bg"):
+        overrides["bg_color"] = row["bg"]
+    return replace(base, **overrides) if overrides else base
+
+
+def output_name(template, index, row):
+    """Fill the filename template from the row's fields and its index"""
+    if row.get("filename"):
+        return row["filename"]
+    fields = {key: value for key, value in row.items() if isinstance(key, str)}
+    fields["index"] = index
+    return template.format_map(fields)
+
+
+def unsafe_name(name):
+    """Why an output name would land outside the output folder or archive root, or None"""
+    if not name:
+        return "empty file name"
+    if os.path.isabs(name) or os.path.splitdrive(name)[0] or name.startswith(("/", "\\")):
+        return "absolute paths are not allowed"
+    if ".." in name.replace("\\", "/").split("/"):
+        return "'..' is not allowed"
+    return None
+
+
+def payload_template(args):
+    """The PayloadTemplate the WiFi/vCard options describe, or None for other types"""
+    qr_type = (args.type or "").lower()
+    if qr_type not in ("wifi", "vcard"):
+        if args.map:
+            raise ValueError("--map needs --type wifi or --type vcard")
+        return None
+    template = PayloadTemplate(qr_type, parse_fields(qr_type, args.map or []), version=args.vcard_version,
+                               security=args.security or "", hidden=args.hidden)
+    compile_template(template)  # reject a bad template before any row is read
+    return template
+
+
+def plan_jobs(rows, base, args, stats, variants=(), template=None):
+    """Turn input rows into batch jobs, skipping outputs that already exist"""
+    from qr_batch import BatchJob, sampled
+    from qr_fanout import variant_path
+
+    for index, row in enumerate(rows, start=1):
+        verify = sampled(index, args.verify)
+        try:
+            name = output_name(args.name, index, row)
+        except (KeyError, IndexError, ValueError) as e:
+            # a row without a --name column fails on its own instead of stopping the batch
+            missing = f"no '{e.args[0]}' column" if isinstance(e, KeyError) else str(e)
+            yield BatchJob(index, row, base, "", args.type, error=f"--name {args.name}: {missing}")
+            continue
+        problem = unsafe_name(name)
+        if problem:
+            source = "filename" if row.get("filename") else f"--name {args.name}"
+            yield BatchJob(index, row, base, "", args.type, error=f"{source} '{name}': {problem}")
+            continue
+        if args.archive:
+            yield BatchJob(index, row, row_options(base, row), name, args.type, keep_bytes=True,
+                           variants=variants, verify=verify, template=template)
+            continue
+        path = os.path.join(args.output, name)
+        outputs = [variant_path(path, variant) for variant in variants] or [path]
+        if args.resume and all(os.path.exists(output) for output in outputs):
+            stats["skipped"] += 1
+            continue
+        yield BatchJob(index, row, row_options(base, row), path, args.type, variants=variants, verify=verify,
+                       template=template)
+
+
+def add_render_arguments(parser):
+    parser.add_argument("--fg", default="black", help="QR color")
+    parser.add_argument("--bg", default="white", help="background color")
+    parser.add_argument("--logo", help="logo image to paste in the middle")
+    parser.add_argument("--logo-size", type=int, default=25, help="logo size in percent (10-40)")
+    parser.add_argument("--error-correction", choices=ERROR_CHOICES, default="auto",
+                        help="auto picks the lowest level that survives the logo")
+    parser.add_argument("--box-size", type=int, default=10)
+    parser.add_argument("--border", type=int, default=4)
+    parser.add_argument("--unscaled", action="store_true",
+                        help="one pixel per module and no border, for scaling downstream")
+    parser.add_argument("--compression", choices=COMPRESSION_CHOICES, default="default",
+                        help="PNG effort: fast (zlib 1), default (8) or small (9 + optimize)")
+
+
+def render_options_from_args(args):
+    from qr_render import RenderOptions
+
+    return RenderOptions(
+        fg_color=args.fg,
+        bg_color=args.bg,
+        logo_path=args.logo,
+        logo_size=args.logo_size,
+        error_correction=args.error_correction,
+        box_size=1 if args.unscaled else args.box_size,
+        border=0 if args.unscaled else args.border,
+        compression=args.compression,
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="nmqr", description="QR code generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="render many QR codes from a file or stdin")
+    batch.add_argument("input", nargs="?", default="-", help="input file, or - for stdin")
+    batch.add_argument("-o", "--output", default=".", help="output folder")
+    batch.add_argument("--format", choices=["auto", "lines", "csv", "jsonl"], default="auto")
+    batch.add_argument("--column", default="data", help="CSV column holding the content")
+    batch.add_argument("--type", help="default QR type (auto, text, wifi, vcard, ...)")
+    batch.add_argument("--map", action="append", metavar="FIELD=SOURCE",
+                       help="with --type wifi/vcard, take a field from a column or a column template, "
+                            "e.g. --map 'name={First} {Last}' --map phone=Mobile (repeatable)")
+    batch.add_argument("--vcard-version", choices=VCARD_VERSIONS, default="3.0")
+    batch.add_argument("--security", choices=SECURITY_CHOICES,
+                       help="WiFi security for rows without a security column "
+                            "(default: WPA with a password, else nopass)")
+    batch.add_argument("--hidden", action="store_true", help="mark WiFi networks as hidden")
+    batch.add_argument("--name", default=DEFAULT_TEMPLATE,
+                       help="filename template, e.g. '{index:06d}.png' or '{sku}.png'")
+    batch.add_argument("--resume", action="store_true", help="skip outputs that already exist")
+    batch.add_argument("--sizes", help="encode each item once and save it at these pixel widths, "
+                                       "e.g. 350,512,2048 (files get a _512px suffix)")
+    batch.add_argument("--formats", help="save each item in these formats, e.g. png,webp,jpeg "
+                                         "(default: the --name extension)")
+    batch.add_argument("--verify", type=float, nargs="?", const=1.0, default=0.0, metavar="SHARE",
+                       help="decode every code after rendering (or an evenly spread share, e.g. 0.1) "
+                            "and flag the ones that won't scan in the manifest")
+    batch.add_argument("--archive", help="write everything into this .zip, .tar or .tar.gz instead of a folder; "
+                                         "ZIP keeps ~500 B per entry until closed, so use .tar for millions")
+    batch.add_argument("--deflate", action="store_true",
+                       help="compress ZIP entries (PNGs are already compressed, so off by default)")
+    batch.add_argument("--manifest", choices=["csv", "json"],
+                       help="also write a manifest (always included in archives, csv by default)")
+    batch.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    batch.add_argument("--chunk-size", type=int, default=16)
+    batch.add_argument("--memory-budget", type=int, default=256,
+                       help="MB of rendered images held between the workers and the writer; "
+                            "beyond that they are spilled to a temporary file")
+    batch.add_argument("--spool-dir", help="where to spill results (default: the system temp folder)")
+    batch.add_argument("--cache-dir", help="keep rendered images here and reuse them across runs")
+    batch.add_argument("--cache-size", type=int, default=64, help="in-memory cache per worker, in MB")
+    batch.add_argument("--metrics", help="write per-stage timings here (.json, or .prom for Prometheus)")
+    add_render_arguments(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    profile = commands.add_parser("profile", help="show the encode profile chosen for a payload")
+    profile.add_argument("data", help="content to encode (goes through type detection)")
+    add_render_arguments(profile)
+    profile.set_defaults(func=cmd_profile)
+
+    serve = commands.add_parser("serve", help="run the local HTTP rendering service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    add_render_arguments(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def cmd_serve(args):
+    from qr_logging import setup_logging
+    from qr_server import serve
+
+    setup_logging(None, stream=sys.stderr)
+    serve(args.host, args.port, args.workers, render_options_from_args(args), args.logo)
+    return 0
+
+
+def cmd_profile(args):
+    from qr_profile import choose_profile
+
+    data, input_type = build_payload({"data": args.data})
+    print(f"{input_type}: {choose_profile(data, render_options_from_args(args)).report()}")
+    return 0
+
+
+def cmd_batch(args):
+    from qr_archive import ArchiveWriter, ManifestWriter, manifest_filename
+    from qr_fanout import parse_variants
+    from qr_render import format_for_path
+    from qr_scheduler import BatchScheduler
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "lines" if args.input == "-" else detect_format(args.input)
+
+    if args.archive and args.resume:
+        print("--resume cannot be used with --archive", file=sys.stderr)
+        return 2
+    if not 0 <= args.verify <= 1:
+        print("--verify takes a share between 0 and 1, e.g. 0.1", file=sys.stderr)
+        return 2
+
+    try:
+        list(Formatter().parse(args.name))
+        template = payload_template(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    variants = ()
+    if args.sizes or args.formats:
+        try:
+            variants = tuple(parse_variants(args.sizes or "", args.formats or format_for_path(args.name)))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    if args.archive:
+        try:
+            writer = ArchiveWriter(args.archive, compress=args.deflate, manifest=args.manifest or "csv")
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        writer = None
+        if args.manifest:
+            manifest_path = os.path.join(args.output, manifest_filename(args.manifest))
+            # a resumed run adds its rows to those of the runs before it
+            append = args.resume and os.path.exists(manifest_path) and os.path.getsize(manifest_path) > 0
+            manifest_file = open(manifest_path, "a" if append else "w", newline="", encoding="utf-8")
+            writer = ManifestWriter(manifest_file, args.manifest, header=not append)
+
+    if args.metrics:
+        qr_metrics.enable()
+
+    def write(result):
+        if writer:
+            writer.add(result)
+        if not result.ok:
+            print(f"✗ item {result.index} '{result.item}': {result.error}", file=sys.stderr)
+        elif result.verified is False:
+            print(f"✗ item {result.index} '{result.item}' won't scan: {result.verify_detail}", file=sys.stderr)
+
+    # utf-8-sig drops the byte order mark Excel puts on "CSV UTF-8" exports, which
+    # would otherwise end up in the first column name
+    stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+    skipped = {"skipped": 0}
+    try:
+        rows = read_rows(stream, fmt, args.column)
+        jobs = plan_jobs(rows, render_options_from_args(args), args, skipped, variants, template)
+        scheduler = BatchScheduler(workers=args.workers, chunk_size=args.chunk_size,
+                                   memory_budget=args.memory_budget * 1024 * 1024, spool_dir=args.spool_dir,
+                                   cache_bytes=args.cache_size * 1024 * 1024, cache_dir=args.cache_dir)
+        stats = scheduler.run(jobs, write)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if isinstance(writer, ArchiveWriter):
+            writer.close()
+        elif writer:
+            manifest_file.close()
+
+    print(f"Generated {stats.done} QR codes, skipped {skipped['skipped']}, failed {stats.failed}", file=sys.stderr)
+    print(f"Output: {stats.output_report()}", file=sys.stderr)
+    if stats.verified:
+        print(stats.verify_report(), file=sys.stderr)
+    print(stats.memory_report(), file=sys.stderr)
+    if args.metrics:
+        qr_metrics.export(args.metrics)
+    return 1 if stats.failed or stats.unreadable else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
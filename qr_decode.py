@@ -0,0 +1,367 @@
+"""Pure-Python QR decoder, used to check that rendered codes still scan.
+
+This is not a camera scanner: it reads upright, unskewed images like the
+ones this project writes (any box size, border, colors, logo or raster
+format, JPEG included). It reads them the way a scanner does once it has
+found the code:
+
+    threshold      Otsu's method on the luminance histogram; a transparent
+                   background is seen against white
+    locate         bounding box of the dark pixels, module pitch from the
+                   top row of the top-left finder, version from the width
+    sample         one pixel at the centre of every module; finder
+                   patterns are checked to catch a wrong grid
+    format         both copies, up to 3 bit errors each
+    codewords      unmasked and de-interleaved with qr_encode's layout and
+                   block tables
+    correction     Reed-Solomon errors-only decoding per block (a scanner
+                   doesn't know where the logo is), within the spec's
+                   limit, which keeps some codewords for misdecode
+                   protection in versions 1-3
+    segments       numeric, alphanumeric, byte, kanji and ECI
+
+so a logo that hides more modules than the error correction can repair
+fails here as it would on a phone.
+
+    decoded = decode_image(Image.open("qr.png"))
+    decoded.text, decoded.errors, decoded.margin
+"""
+from dataclasses import dataclass
+
+from qrcode import base, util
+from qrcode.util import MODE_8BIT_BYTE, MODE_ALPHA_NUM, MODE_KANJI, MODE_NUMBER
+
+from qr_encode import MISDECODE_CODEWORDS, _format_cells, default_encoder
+from qr_render import ERROR_LEVELS
+
+MODE_ECI = 7
+
+_EXP = [base.gexp(i) for i in range(512)]
+_LOG = [0] + [base.glog(i) for i in range(1, 256)]
+
+# Every valid format word, with the level and mask it stands for
+_FORMATS = [(util.BCH_type_info(bits << 3 | mask), level, mask)
+            for level, bits in ERROR_LEVELS.items() for mask in range(8)]
+
+_CHARSETS = {3: "latin-1", 4: "iso-8859-2", 20: "shift_jis", 26: "utf-8"}
+
+
+class DecodeError(ValueError):
+    """The image doesn't decode (the message says at which step)"""
+
+
+@dataclass
+class Decoded:
+    text: str
+    version: int
+    level: str
+    mask: int
+    errors: int  # codewords corrected, over all blocks
+    margin: float  # share of the correction capacity left in the worst block
+
+    def report(self):
+        return (f"version {self.version}-{self.level}, {self.errors} codewords corrected, "
+                f"{self.margin:.0%} correction margin left")
+
+
+def _mul(a, b):
+    if not a or not b:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def _div(a, b):
+    if not a:
+        return 0
+    return _EXP[_LOG[a] + 255 - _LOG[b]]
+
+
+def _eval(poly, x):
+    """Value at ``x`` of a polynomial given lowest degree first"""
+    y = 0
+    for coefficient in reversed(poly):
+        y = _mul(y, x) ^ coefficient
+    return y
+
+
+def _syndromes(block, count):
+    syndromes = []
+    for j in range(count):
+        x = _EXP[j]
+        y = 0
+        for byte in block:
+            y = _mul(y, x) ^ byte
+        syndromes.append(y)
+    return syndromes
+
+
+def _locator(syndromes):
+    """Berlekamp-Massey: error locator polynomial, lowest degree first"""
+    locator, previous = [1], [1]
+    errors, shift, last = 0, 1, 1
+    for n, syndrome in enumerate(syndromes):
+        delta = syndrome
+        for i in range(1, errors + 1):
+            if i < len(locator):
+                delta ^= _mul(locator[i], syndromes[n - i])
+        if not delta:
+            shift += 1
+            continue
+        scale = _div(delta, last)
+        update = list(locator) + [0] * max(0, len(previous) + shift - len(locator))
+        for i, coefficient in enumerate(previous):
+            update[i + shift] ^= _mul(scale, coefficient)
+        if 2 * errors <= n:
+            previous, errors, last, shift = locator, n + 1 - errors, delta, 1
+        else:
+            shift += 1
+        locator = update
+    return locator[:errors + 1], errors
+
+
+def correct(block, ec_count, limit=None):
+    """Correct a block of data + EC codewords in place; returns the number of errors fixed.
+
+    ``limit`` caps the errors accepted (by default ``ec_count // 2``);
+    more than that raises DecodeError.
+    """
+    syndromes = _syndromes(block, ec_count)
+    if not any(syndromes):
+        return 0
+    limit = ec_count // 2 if limit is None else limit
+    locator, count = _locator(syndromes)
+    if count > limit:
+        raise DecodeError(f"too many errors in a block (more than {limit})")
+
+    n = len(block)
+    positions = [p for p in range(n) if not _eval(locator, _EXP[(255 - p) % 255])]
+    if len(positions) != count:
+        raise DecodeError("uncorrectable block")
+
+    # Forney, with the generator's roots starting at a^0
+    evaluator = [0] * ec_count
+    for i, s in enumerate(syndromes):
+        for j, l in enumerate(locator):
+            if i + j < ec_count:
+                evaluator[i + j] ^= _mul(s, l)
+    derivative = [locator[i] if i % 2 else 0 for i in range(1, len(locator))]
+    for p in positions:
+        inverse = _EXP[(255 - p) % 255]
+        value = _mul(_EXP[p], _div(_eval(evaluator, inverse), _eval(derivative, inverse)))
+        block[n - 1 - p] ^= value
+
+    if any(_syndromes(block, ec_count)):
+        raise DecodeError("uncorrectable block")
+    return count
+
+
+def _threshold(histogram):
+    """Otsu's threshold for a 256-bin histogram"""
+    total = sum(histogram)
+    weighted = sum(i * count for i, count in enumerate(histogram))
+    best, threshold = -1.0, 128
+    below = below_weighted = 0
+    for i, count in enumerate(histogram[:-1]):
+        below += count
+        below_weighted += i * count
+        above = total - below
+        if not below or not above:
+            continue
+        gap = below_weighted / below - (weighted - below_weighted) / above
+        spread = below * above * gap * gap
+        if spread > best:
+            best, threshold = spread, i + 1
+    return threshold
+
+
+def _luminance(img):
+    from PIL import Image
+
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        img = img.convert("RGBA")
+        flat = Image.new("RGB", img.size, "white")
+        flat.paste(img, mask=img.getchannel("A"))
+        img = flat
+    return img.convert("L")
+
+
+def sample(img):
+    """Module grid of the code in ``img`` as (size, bytearray of 0/1, row-major)"""
+    gray = _luminance(img)
+    cutoff = _threshold(gray.histogram())
+    dark = gray.point(lambda v: 255 if v < cutoff else 0)
+    box = dark.getbbox()
+    if box is None:
+        raise DecodeError("no dark modules found")
+    left, top, right, bottom = box
+    pixels = dark.tobytes()
+    width = dark.width
+
+    row = pixels[top * width + left:top * width + right]
+    finder = len(row) - len(row.lstrip(b"\xff"))
+    size = round((right - left) * 7 / finder) if finder else 0
+    version = round((size - 17) / 4)
+    if not 1 <= version <= 40:
+        raise DecodeError("no QR symbol found")
+    size = version * 4 + 17
+
+    pitch_x = (right - left) / size
+    pitch_y = (bottom - top) / size
+    xs = [left + int((c + 0.5) * pitch_x) for c in range(size)]
+    grid = bytearray(size * size)
+    for r in range(size):
+        offset = (top + int((r + 0.5) * pitch_y)) * width
+        grid[r * size:(r + 1) * size] = bytes(1 if pixels[offset + x] else 0 for x in xs)
+    _check_finders(grid, size)
+    return size, grid
+
+
+def _check_finders(grid, size):
+    wrong = 0
+    for top, left in ((0, 0), (0, size - 7), (size - 7, 0)):
+        for r in range(7):
+            for c in range(7):
+                ring = max(abs(r - 3), abs(c - 3))
+                wrong += grid[(top + r) * size + left + c] != (ring != 2)
+    if wrong > 14:  # of 147 finder modules
+        raise DecodeError("finder patterns not found")
+
+
+def read_format(grid, size):
+    """(level, mask) from the better of the two format copies"""
+    cells = _format_cells(size)
+    best = None
+    for copy in (cells[:15], cells[15:]):
+        word = 0
+        for i, cell in copy:
+            word |= grid[cell] << i
+        for valid, level, mask in _FORMATS:
+            distance = bin(word ^ valid).count("1")
+            if best is None or distance < best[0]:
+                best = (distance, level, mask)
+    if best[0] > 3:
+        raise DecodeError("format information unreadable")
+    return best[1], best[2]
+
+
+def _codewords(grid, version, level, mask, encoder):
+    layout = encoder.layout(version)
+    blocks = encoder.blocks(version, level)
+    total = sum(data + ec for data, ec in blocks)
+    flips = layout.mask_bits(mask)
+    bits = bytes(grid[cell] ^ flip for cell, flip in zip(layout.data_cells[:total * 8], flips))
+    stream = int(bits.translate(bytes.maketrans(b"\x00\x01", b"01")), 2).to_bytes(total, "big")
+
+    # undo the interleaving: data codewords column by column, then EC codewords
+    pieces = [bytearray() for _ in blocks]
+    position = 0
+    for part in (0, 1):
+        for i in range(max(block[part] for block in blocks)):
+            for piece, block in zip(pieces, blocks):
+                if i < block[part]:
+                    piece.append(stream[position])
+                    position += 1
+    return pieces, blocks
+
+
+class _Bits:
+    def __init__(self, data):
+        self.value = int.from_bytes(data, "big")
+        self.left = len(data) * 8
+
+    def read(self, count):
+        if count > self.left:
+            raise DecodeError("data ends inside a segment")
+        self.left -= count
+        return self.value >> self.left & ((1 << count) - 1)
+
+
+def _segments(data, version):
+    """Payload bytes and the charset they should be decoded with"""
+    bits = _Bits(data)
+    out = bytearray()
+    charset = None
+    while bits.left >= 4:
+        mode = bits.read(4)
+        if mode == 0:
+            break
+        if mode == MODE_ECI:
+            first = bits.read(8)
+            if first < 0x80:
+                designator = first
+            elif first < 0xC0:
+                designator = (first & 0x3F) << 8 | bits.read(8)
+            else:
+                designator = (first & 0x1F) << 16 | bits.read(16)
+            charset = _CHARSETS.get(designator, charset)
+            continue
+        if mode not in (MODE_NUMBER, MODE_ALPHA_NUM, MODE_8BIT_BYTE, MODE_KANJI):
+            raise DecodeError(f"unsupported segment mode {mode}")
+        count = bits.read(util.length_in_bits(mode, version))
+        if mode == MODE_NUMBER:
+            while count:
+                digits = min(count, 3)
+                value = bits.read(util.NUMBER_LENGTH[digits])
+                out += str(value).zfill(digits).encode("ascii")
+                count -= digits
+        elif mode == MODE_ALPHA_NUM:
+            while count >= 2:
+                value = bits.read(11)
+                out += util.ALPHA_NUM[value // 45:value // 45 + 1] + util.ALPHA_NUM[value % 45:value % 45 + 1]
+                count -= 2
+            if count:
+                value = bits.read(6)
+                out += util.ALPHA_NUM[value:value + 1]
+        elif mode == MODE_8BIT_BYTE:
+            out += bytes(bits.read(8) for _ in range(count))
+        else:
+            for _ in range(count):
+                value = bits.read(13)
+                code = (value // 0xC0) << 8 | value % 0xC0
+                code += 0x8140 if code < 0x1F00 else 0xC140
+                out += bytes((code >> 8, code & 0xFF))
+            charset = charset or "shift_jis"
+    return bytes(out), charset
+
+
+def decode_grid(grid, size, encoder=None):
+    """Decode a sampled module grid (see ``sample()``)"""
+    encoder = encoder or default_encoder()
+    version = (size - 17) // 4
+    level, mask = read_format(grid, size)
+    pieces, blocks = _codewords(grid, version, level, mask, encoder)
+
+    data = bytearray()
+    errors = 0
+    margin = 1.0
+    reserved = MISDECODE_CODEWORDS.get((version, level), 0)
+    for piece, (data_count, ec_count) in zip(pieces, blocks):
+        limit = (ec_count - reserved) // 2
+        fixed = correct(piece, ec_count, limit)
+        errors += fixed
+        margin = min(margin, 1 - fixed / limit)
+        data += piece[:data_count]
+
+    payload, charset = _segments(bytes(data), version)
+    try:
+        text = payload.decode(charset or "utf-8")
+    except UnicodeDecodeError:
+        text = payload.decode("latin-1")
+    return Decoded(text, version, level, mask, errors, margin)
+
+
+def decode_image(img, encoder=None):
+    """Decode the QR code in a PIL image; raises DecodeError if it can't be read"""
+    size, grid = sample(img)
+    return decode_grid(grid, size, encoder)
+
+
+def verify_image(img, expected):
+    """(True/False, detail): whether ``img`` decodes to ``expected``"""
+    try:
+        decoded = decode_image(img)
+    except DecodeError as e:
+        return False, f"unreadable: {e}"
+    if decoded.text != expected:
+        return False, "decodes to different content"
+    return True, decoded.report()
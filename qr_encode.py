@@ -0,0 +1,452 @@
+"""Compact QR encoder for batch work.
+
+``qrcode.QRCode`` keeps its matrix as lists of Python bools (8 bytes per
+module for the pointer alone, plus a list header per row) and rebuilds the
+Reed-Solomon generator, the function patterns and the mask for every code.
+When only the module matrix is needed, ``encode()`` returns a ``QRMatrix``
+holding the modules packed eight to a byte, and an ``Encoder`` caches what
+depends only on the version and level (generator polynomials, block layout,
+function patterns, data placement order, mask bits), so ``encode_many()``
+pays for them once per run.
+
+The output is module-for-module what ``qr_render.build_qr()`` produces:
+segments, version, mask choice and penalty scoring follow qrcode exactly.
+
+    from qr_encode import encode_many
+    for matrix in encode_many(payloads, level="M"):
+        modules = matrix.to_numpy(border=4)
+"""
+from bisect import bisect_left
+
+from qrcode import base, util
+from qrcode.exceptions import DataOverflowError
+
+from qr_metrics import timed
+from qr_raster import numpy_module
+from qr_render import ERROR_LEVELS, RenderOptions
+
+# Codewords reserved for misdecode protection (ISO/IEC 18004, table 9): a
+# decoder corrects at most (ec_count - reserved) // 2 errors per block
+MISDECODE_CODEWORDS = {(1, "L"): 3, (1, "M"): 2, (1, "Q"): 1, (1, "H"): 1, (2, "L"): 2, (3, "L"): 1}
+
+# Finder-like 1:1:3:1:1 runs with four light modules on either side, as 11-bit numbers
+_FINDER_PATTERNS = (0b10111010000, 0b00001011101)
+
+_BITS = bytes.maketrans(b"\x00\x01", b"01")
+_UNBITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class QRMatrix:
+    """Module matrix of one code, packed row-major at one bit per module"""
+    __slots__ = ("version", "level", "mask", "size", "bits")
+
+    def __init__(self, version, level, mask, bits):
+        self.version = version
+        self.level = level
+        self.mask = mask
+        self.size = version * 4 + 17
+        self.bits = bits
+
+    def __repr__(self):
+        return f"<QRMatrix version {self.version} level {self.level} mask {self.mask}>"
+
+    def __eq__(self, other):
+        if not isinstance(other, QRMatrix):
+            return NotImplemented
+        return (self.version, self.level, self.mask, self.bits) == (
+            other.version, other.level, other.mask, other.bits)
+
+    def __hash__(self):
+        return hash((self.version, self.level, self.mask, self.bits))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+    def dark(self, row, col):
+        index = row * self.size + col
+        return bool(self.bits[index >> 3] >> (7 - (index & 7)) & 1)
+
+    def to_numpy(self, border=0, dtype=None):
+        """2-D NumPy array (bool by default) with ``border`` light modules around it"""
+        np = numpy_module()
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        size = self.size
+        modules = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), count=size * size)
+        modules = modules.reshape(size, size).astype(dtype or bool, copy=False)
+        if border:
+            modules = np.pad(modules, border)
+        return modules
+
+    def to_list(self, border=0):
+        """Lists of bools like ``QRCode.get_matrix()`` (which uses a border of 4)"""
+        size = self.size
+        flat = bin(int.from_bytes(self.bits, "big"))[2:].zfill(len(self.bits) * 8)
+        width = size + 2 * border
+        edge = [[False] * width for _ in range(border)]
+        pad = [False] * border
+        rows = [pad + [bit == "1" for bit in flat[start:start + size]] + pad
+                for start in range(0, size * size, size)]
+        return edge + rows + [list(row) for row in edge]
+
+
+class _Layout:
+    """Everything about a version that doesn't depend on the data"""
+    __slots__ = ("size", "template", "data_cells", "format_cells", "version_cells", "dark_cell",
+                 "masks", "np_template", "np_cells", "np_masks")
+
+    def __init__(self, version):
+        size = self.size = version * 4 + 17
+        grid = _function_patterns(version)
+        self.template = bytearray(1 if dark else 0 for row in grid for dark in row)
+        self.data_cells = [row * size + col for row, col in _data_order(grid)]
+        self.format_cells = _format_cells(size)
+        self.version_cells = _version_cells(size) if version >= 7 else []
+        self.dark_cell = (size - 8) * size + 8
+        self.masks = [None] * 8
+        self.np_template = self.np_cells = self.np_masks = None
+
+    def mask_bits(self, pattern):
+        """0/1 per data cell, in placement order"""
+        bits = self.masks[pattern]
+        if bits is None:
+            flip = util.mask_func(pattern)
+            size = self.size
+            bits = self.masks[pattern] = bytes(
+                1 if flip(*divmod(cell, size)) else 0 for cell in self.data_cells)
+        return bits
+
+
+def _function_patterns(version):
+    """qrcode's own function pattern setup, with format and version info cleared"""
+    from qrcode.main import QRCode
+
+    qr = QRCode(version=version)
+    size = qr.modules_count = version * 4 + 17
+    qr.modules = [[None] * size for _ in range(size)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(size - 7, 0)
+    qr.setup_position_probe_pattern(0, size - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(True, 0)
+    if version >= 7:
+        qr.setup_type_number(True)
+    return qr.modules
+
+
+def _data_order(grid):
+    """Free cells in the order ``QRCode.map_data()`` fills them"""
+    size = len(grid)
+    upward = True
+    for col in range(size - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        for row in (range(size - 1, -1, -1) if upward else range(size)):
+            for c in (col, col - 1):
+                if grid[row][c] is None:
+                    yield row, c
+        upward = not upward
+
+
+def _format_cells(size):
+    """(bit, cell) pairs for both copies of the format information"""
+    cells = []
+    for i in range(15):
+        row = i if i < 6 else i + 1 if i < 8 else size - 15 + i
+        cells.append((i, row * size + 8))
+    for i in range(15):
+        col = size - i - 1 if i < 8 else 15 - i if i < 9 else 15 - i - 1
+        cells.append((i, 8 * size + col))
+    return cells
+
+
+def _version_cells(size):
+    cells = []
+    for i in range(18):
+        cells.append((i, (i // 3) * size + i % 3 + size - 11))
+        cells.append((i, (i % 3 + size - 11) * size + i // 3))
+    return cells
+
+
+def fit_version(segments, level):
+    """The version ``QRCode.best_fit()`` picks for ``segments``"""
+    limits = util.BIT_LIMIT_TABLE[ERROR_LEVELS[level]]
+    start = 1
+    while True:
+        sizes = util.mode_sizes_for_version(start)
+        bits = sum(4 + sizes[s.mode] + _body_bits(s) for s in segments)
+        version = bisect_left(limits, bits, start)
+        if version == 41:
+            raise DataOverflowError()
+        if sizes is util.mode_sizes_for_version(version):
+            return version
+        start = version
+
+
+def _body_bits(segment):
+    count = len(segment)
+    if segment.mode == util.MODE_NUMBER:
+        return 10 * (count // 3) + util.NUMBER_LENGTH.get(count % 3, 0)
+    if segment.mode == util.MODE_ALPHA_NUM:
+        return 11 * (count // 2) + 6 * (count % 2)
+    return 8 * count
+
+
+def _segment_value(segment):
+    """(value, bit length) of a segment's body"""
+    data = segment.data
+    value = 0
+    if segment.mode == util.MODE_NUMBER:
+        for i in range(0, len(data), 3):
+            chunk = data[i:i + 3]
+            value = value << util.NUMBER_LENGTH[len(chunk)] | int(chunk)
+    elif segment.mode == util.MODE_ALPHA_NUM:
+        find = util.ALPHA_NUM.find
+        for i in range(0, len(data) - 1, 2):
+            value = value << 11 | find(data[i]) * 45 + find(data[i + 1])
+        if len(data) % 2:
+            value = value << 6 | find(data[-1])
+    else:
+        value = int.from_bytes(data, "big")
+    return value, _body_bits(segment)
+
+
+class Encoder:
+    """Encodes payloads to ``QRMatrix``, caching per-version and per-level tables"""
+
+    def __init__(self):
+        self._generators = {}
+        self._rs_tables = {}
+        self._blocks = {}
+        self._layouts = {}
+        self._np = numpy_module()
+
+    def layout(self, version):
+        layout = self._layouts.get(version)
+        if layout is None:
+            layout = self._layouts[version] = _Layout(version)
+        return layout
+
+    def generator(self, count):
+        """Log-domain coefficients of the degree ``count`` RS generator, leading 1 dropped"""
+        generator = self._generators.get(count)
+        if generator is None:
+            poly = [1]
+            for i in range(count):
+                # multiply by (x + a^i), highest power first
+                poly = [a ^ (base.gexp(base.glog(b) + i) if b else 0)
+                        for a, b in zip(poly + [0], [0] + poly)]
+            generator = self._generators[count] = [base.glog(c) for c in poly[1:]]
+        return generator
+
+    def rs_table(self, count):
+        """Generator times every byte value, each product packed into one integer"""
+        table = self._rs_tables.get(count)
+        if table is None:
+            generator = self.generator(count)
+            table = [0] + [
+                int.from_bytes(bytes(base.gexp(base.glog(factor) + c) for c in generator), "big")
+                for factor in range(1, 256)]
+            self._rs_tables[count] = table
+        return table
+
+    def blocks(self, version, level):
+        key = (version, level)
+        blocks = self._blocks.get(key)
+        if blocks is None:
+            blocks = self._blocks[key] = [
+                (block.data_count, block.total_count - block.data_count)
+                for block in base.rs_blocks(version, ERROR_LEVELS[level])]
+        return blocks
+
+    def segments(self, data, level, options=None):
+        """(segments, version, level) the way ``qr_render.build_qr()`` chooses them"""
+        if level == "auto":
+            from qr_profile import choose_profile
+
+            profile = choose_profile(data, options or RenderOptions())
+            return profile.segments, profile.version, profile.level
+        if isinstance(data, util.QRData):
+            segments = [data]
+        else:
+            segments = list(util.optimal_data_chunks(data, minimum=20))
+        return segments, fit_version(segments, level), level
+
+    def codewords(self, segments, version, level):
+        """Interleaved data and error-correction codewords, as ``util.create_data()``"""
+        blocks = self.blocks(version, level)
+        capacity = sum(data_count for data_count, _ in blocks) * 8
+        value = length = 0
+        for segment in segments:
+            count_bits = util.length_in_bits(segment.mode, version)
+            body, body_bits = _segment_value(segment)
+            value = ((value << 4 | segment.mode) << count_bits | len(segment)) << body_bits | body
+            length += 4 + count_bits + body_bits
+        if length > capacity:
+            raise DataOverflowError(
+                f"Code length overflow. Data size ({length}) > size available ({capacity})")
+
+        terminator = min(capacity - length, 4)
+        terminator += -(length + terminator) % 8
+        value <<= terminator
+        length += terminator
+        data = bytearray(value.to_bytes(length // 8, "big"))
+        pad = (capacity - length) // 8
+        data += (bytes((util.PAD0, util.PAD1)) * (pad // 2 + 1))[:pad]
+
+        data_blocks, ec_blocks = [], []
+        offset = 0
+        for data_count, ec_count in blocks:
+            chunk = data[offset:offset + data_count]
+            offset += data_count
+            # polynomial division with the remainder held as one integer
+            table = self.rs_table(ec_count)
+            top = 8 * (ec_count - 1)
+            full = (1 << 8 * ec_count) - 1
+            remainder = 0
+            for byte in chunk:
+                remainder = (remainder << 8 & full) ^ table[byte ^ remainder >> top]
+            data_blocks.append(chunk)
+            ec_blocks.append(remainder.to_bytes(ec_count, "big"))
+
+        out = bytearray()
+        for group in (data_blocks, ec_blocks):
+            for i in range(max(len(block) for block in group)):
+                out.extend(block[i] for block in group if i < len(block))
+        return bytes(out)
+
+    def encode(self, data, level="H", options=None, mask=None):
+        """``QRMatrix`` for ``data`` (a string, bytes or a ``util.QRData`` segment)"""
+        with timed("encode"):
+            segments, version, level = self.segments(data, level, options)
+            return self.encode_segments(segments, version, level, mask)
+
+    def encode_segments(self, segments, version, level, mask=None):
+        layout = self.layout(version)
+        codewords = self.codewords(segments, version, level)
+        cells = len(layout.data_cells)
+        bits = bin(int.from_bytes(codewords, "big"))[2:].zfill(len(codewords) * 8)
+        bits = bits.encode("ascii").translate(_UNBITS)[:cells].ljust(cells, b"\x00")
+
+        place = self._place_python if self._np is None else self._place_numpy
+        pattern, modules = place(layout, bits, mask)
+
+        info = util.BCH_type_info(ERROR_LEVELS[level] << 3 | pattern)
+        for i, cell in layout.format_cells:
+            modules[cell] = info >> i & 1
+        if layout.version_cells:
+            number = util.BCH_type_number(version)
+            for i, cell in layout.version_cells:
+                modules[cell] = number >> i & 1
+        modules[layout.dark_cell] = 1
+        return QRMatrix(version, level, pattern, _pack(modules))
+
+    def _place_python(self, layout, bits, mask):
+        data_cells = layout.data_cells
+        candidates = range(8) if mask is None else (mask,)
+        best = None
+        for pattern in candidates:
+            modules = bytearray(layout.template)
+            flips = layout.mask_bits(pattern)
+            for cell, bit, flip in zip(data_cells, bits, flips):
+                modules[cell] = bit ^ flip
+            if mask is not None:
+                return pattern, modules
+            size = layout.size
+            grid = [modules[start:start + size] for start in range(0, size * size, size)]
+            score = util.lost_point(grid)
+            if best is None or score < best[0]:
+                best = (score, pattern, modules)
+        return best[1], best[2]
+
+    def _place_numpy(self, layout, bits, mask):
+        np = self._np
+        if layout.np_template is None:
+            layout.np_template = np.frombuffer(bytes(layout.template), dtype=np.uint8)
+            layout.np_cells = np.array(layout.data_cells, dtype=np.intp)
+            layout.np_masks = np.frombuffer(
+                b"".join(layout.mask_bits(pattern) for pattern in range(8)), dtype=np.uint8).reshape(8, -1)
+        data = np.frombuffer(bits, dtype=np.uint8)
+        if mask is not None:
+            modules = layout.np_template.copy()
+            modules[layout.np_cells] = data ^ layout.np_masks[mask]
+            return mask, modules
+
+        # all eight candidates at once, scored together
+        size = layout.size
+        stack = np.repeat(layout.np_template[None], 8, axis=0)
+        stack[:, layout.np_cells] = data ^ layout.np_masks
+        pattern = int(np.argmin(_lost_points(np, stack.reshape(8, size, size))))
+        return pattern, stack[pattern]
+
+
+def _lost_points(np, grids):
+    """``util.lost_point()`` for each matrix in a (count, size, size) uint8 stack"""
+    count, size = grids.shape[:2]
+    scores = np.zeros(count, dtype=np.int64)
+    width = size - 10
+    sentinel = np.full((count, size, 1), 2, dtype=np.uint8)
+    for grid in (grids, grids.transpose(0, 2, 1)):
+        # runs of five or more same-colored modules: length - 2 each
+        flat = np.concatenate((grid, sentinel), axis=2).ravel()
+        starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+        runs = np.diff(np.append(starts, len(flat)))
+        long_runs = runs >= 5
+        scores += np.bincount(starts[long_runs] // (size * (size + 1)),
+                              weights=runs[long_runs] - 2, minlength=count).astype(np.int64)
+
+        # finder-like 1:1:3:1:1 patterns, each 11-module window read as a number
+        windows = np.zeros((count, size, width), dtype=np.int16)
+        for offset in range(11):
+            windows = windows << 1 | grid[:, :, offset:offset + width]
+        scores += 40 * np.isin(windows, _FINDER_PATTERNS).sum(axis=(1, 2))
+
+    # 2x2 blocks of one color
+    top, bottom = grids[:, :-1], grids[:, 1:]
+    corner = top[:, :, :-1]
+    same = (corner == top[:, :, 1:]) & (corner == bottom[:, :, :-1]) & (corner == bottom[:, :, 1:])
+    scores += 3 * same.sum(axis=(1, 2))
+
+    # dark module balance, with qrcode's float arithmetic
+    for i, dark in enumerate(grids.sum(axis=(1, 2)).tolist()):
+        scores[i] += int(abs(float(dark) / (size ** 2) * 100 - 50) / 5) * 10
+    return scores
+
+
+def _pack(modules):
+    """Pack 0/1 values (bytearray or uint8 array) eight to a byte"""
+    if not isinstance(modules, bytearray):
+        np = numpy_module()
+        return np.packbits(modules).tobytes()
+    length = len(modules)
+    value = int(bytes(modules).translate(_BITS), 2) << (-length % 8)
+    return value.to_bytes((length + 7) // 8, "big")
+
+
+_default = None
+
+
+def default_encoder():
+    global _default
+    if _default is None:
+        _default = Encoder()
+    return _default
+
+
+def encode(data, level="H", options=None, mask=None):
+    """Encode one payload with the shared ``Encoder``"""
+    return default_encoder().encode(data, level, options, mask)
+
+
+def encode_many(items, level="H", options=None, encoder=None):
+    """Encode every payload in ``items`` lazily, sharing one ``Encoder``'s tables"""
+    encoder = encoder or default_encoder()
+    for data in items:
+        yield encoder.encode(data, level, options)
+
+
+def matrix_for(data, options):
+    """``QRMatrix`` for ``data`` at the level ``options`` asks for"""
+    return encode(data, options.error_correction, options)
@@ -0,0 +1,155 @@
+"""Several sizes and formats of one code from a single encode.
+
+Print and web want the same code as, say, a 350px thumbnail, 512px and
+2048px, each as PNG, WebP and JPEG. ``render_variants()`` fits the matrix
+once, rasterizes once per distinct size by whole-module scaling (the largest
+box size whose image still fits the requested width, so no resampling blurs
+module edges; rasters are then centred on a canvas of exactly that width,
+widening the quiet zone) and encodes the formats on a thread pool; Pillow's
+encoders release the GIL.
+
+    variants = parse_variants("350,512,2048", "png,webp,jpeg")
+    for output in render_variants(data, RenderOptions(), variants):
+        with open(variant_path("qr.png", output.variant), "wb") as f:
+            f.write(output.data)
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from PIL import Image
+
+from qr_metrics import timed
+from qr_png import encode_image
+from qr_render import build_qr, draw
+from qr_vector import VECTOR_FORMATS, vector_bytes
+
+RASTER_FORMATS = {"PNG": ".png", "WEBP": ".webp", "JPEG": ".jpg"}
+FORMAT_ALIASES = {"JPG": "JPEG"}
+
+
+@dataclass(frozen=True)
+class Variant:
+    """One requested output: width in pixels (None = the options' box size) and format"""
+    size: Optional[int]
+    format: str
+
+    @property
+    def extension(self):
+        return RASTER_FORMATS.get(self.format) or VECTOR_FORMATS[self.format]
+
+
+@dataclass
+class VariantOutput:
+    variant: Variant
+    pixels: int  # image width; vector output covers whole modules only
+    data: bytes
+
+
+def parse_formats(text):
+    """Format names from "png,webp,jpeg" (case-insensitive, jpg = jpeg)"""
+    formats = []
+    for name in text.replace(" ", "").split(","):
+        if not name:
+            continue
+        name = FORMAT_ALIASES.get(name.upper(), name.upper())
+        if name not in RASTER_FORMATS and name not in VECTOR_FORMATS:
+            raise ValueError(f"Unknown format '{name}' (use {', '.join([*RASTER_FORMATS, *VECTOR_FORMATS])})")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def parse_sizes(text):
+    """Pixel widths from a list like 350,512,2048"""
+    sizes = []
+    for size in text.replace(" ", "").split(","):
+        if not size:
+            continue
+        if not size.isdigit() or int(size) < 1:
+            raise ValueError(f"Invalid size '{size}' (use whole pixel widths like 512)")
+        if int(size) not in sizes:
+            sizes.append(int(size))
+    return sizes
+
+
+def parse_variants(sizes, formats):
+    """Every size in every format; no sizes means one of each format at the box size"""
+    return [Variant(size, fmt) for size in (parse_sizes(sizes) or [None]) for fmt in parse_formats(formats)]
+
+
+def variant_path(path, variant):
+    """``path`` with its extension replaced by the variant's size and format"""
+    stem = os.path.splitext(path)[0]
+    if variant.size is None:
+        return stem + variant.extension
+    return f"{stem}_{variant.size}px{variant.extension}"
+
+
+def box_size_for(size, modules, border):
+    """Largest whole box size whose image fits in ``size`` pixels.
+
+    Raises ValueError when not even one pixel per module fits: cropping the
+    symbol to the requested size would leave a code that doesn't scan.
+    """
+    box_size = size // (modules + 2 * border)
+    if box_size < 1:
+        raise ValueError(f"{size}px is too small for this code: {modules} modules plus a {border}-module "
+                         f"border need at least {modules + 2 * border}px")
+    return box_size
+
+
+def fit_canvas(img, size, border):
+    """Centre ``img`` on a ``size`` x ``size`` canvas in its quiet-zone color.
+
+    Without a quiet zone there is no background to extend, so the image is
+    returned as drawn.
+    """
+    if size is None or img.width == size or not border:
+        return img
+    canvas = Image.new(img.mode, (size, size), img.getpixel((0, 0)))
+    if img.mode == "P":
+        canvas.putpalette(img.getpalette(img.palette.mode), img.palette.mode)
+    offset = (size - img.width) // 2
+    canvas.paste(img, (offset, offset))
+    return canvas
+
+
+def render_variants(data, options, variants, workers=None):
+    """Encode ``data`` once and render every variant, in the order given.
+
+    ``workers`` threads encode the images (one per variant by default, up to
+    the CPU count);
+    ``workers=1`` does everything on the calling thread, as batch worker
+    processes do.
+    """
+    qr = build_qr(data, options)
+    modules = qr.modules_count
+    plans = []
+    images = {}
+    for variant in variants:
+        box_size = options.box_size
+        if variant.size is not None:
+            box_size = box_size_for(variant.size, modules, options.border)
+        variant_options = replace(options, box_size=box_size)
+        # draw() may fall back to qrcode's own drawer, which isn't thread safe,
+        # so every raster is drawn here and only the encoding is spread out
+        if variant.format in RASTER_FORMATS and variant.size not in images:
+            images[variant.size] = fit_canvas(draw(qr, variant_options, mode="P"), variant.size, options.border)
+        plans.append((variant, variant_options))
+
+    def encode(plan):
+        variant, variant_options = plan
+        with timed("save"):
+            if variant.format in VECTOR_FORMATS:
+                pixels = (modules + 2 * variant_options.border) * variant_options.box_size
+                return VariantOutput(variant, pixels, vector_bytes(qr, variant_options, variant.format))
+            image = images[variant.size]
+            return VariantOutput(variant, image.width, encode_image(image, variant.format, options.compression))
+
+    workers = workers or min(len(plans), os.cpu_count() or 1)
+    if workers <= 1 or len(plans) == 1:
+        return [encode(plan) for plan in plans]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fanout") as pool:
+        return list(pool.map(encode, plans))
@@ -0,0 +1,160 @@
+"""SQLite-backed history of generated QR codes.
+
+Rows are appended one at a time (no rewriting of the whole history), indexed
+by timestamp, type and payload hash, and searchable through an FTS5 index
+when the SQLite build has it (a LIKE scan otherwise). Pages are fetched with
+keyset pagination so scrolling deep into years of history stays cheap.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    data_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_type ON history (type, timestamp);
+CREATE INDEX IF NOT EXISTS history_data_hash ON history (data_hash);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5 (data, content='history', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, data) VALUES (new.id, new.data);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, data) VALUES ('delete', old.id, old.data);
+END;
+"""
+
+
+def payload_hash(data):
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    words = text.replace('"', ' ').split()
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class HistoryStore:
+    """Append-only history table with search and keyset pagination"""
+
+    def __init__(self, path="qr_history.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, data, qr_type, timestamp=None):
+        """Append one entry and return its id"""
+        timestamp = timestamp or datetime.now().isoformat()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO history (timestamp, type, data, data_hash) VALUES (?, ?, ?, ?)",
+                (timestamp, qr_type, data, payload_hash(data)),
+            )
+        return cur.lastrowid
+
+    def add_many(self, items):
+        """Append ``(data, type, timestamp)`` tuples in one transaction"""
+        with self.conn:
+            self._insert_many(items)
+
+    def _insert_many(self, items):
+        self.conn.executemany(
+            "INSERT INTO history (timestamp, type, data, data_hash) VALUES (?, ?, ?, ?)",
+            ((timestamp or datetime.now().isoformat(), qr_type, data, payload_hash(data))
+             for data, qr_type, timestamp in items),
+        )
+
+    def _filters(self, query=None, qr_type=None):
+        joins, where, params = "", [], []
+        if query:
+            # FTS only indexes letters and digits: a search of just quotes or
+            # punctuation would be an empty (invalid) MATCH, so it uses LIKE
+            if self.has_fts and any(ch.isalnum() for ch in query):
+                joins = " JOIN history_fts ON history_fts.rowid = history.id"
+                where.append("history_fts MATCH ?")
+                params.append(fts_query(query))
+            else:
+                where.append("history.data LIKE ? ESCAPE '\\'")
+                escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                params.append(f"%{escaped}%")
+        if qr_type:
+            where.append("history.type = ?")
+            params.append(qr_type)
+        return joins, where, params
+
+    def page(self, limit=100, before=None, query=None, qr_type=None):
+        """Newest entries first; pass the last row of a page as ``before`` for the next one"""
+        joins, where, params = self._filters(query, qr_type)
+        if before is not None:
+            where.append("(history.timestamp, history.id) < (?, ?)")
+            params.extend([before["timestamp"], before["id"]])
+        sql = "SELECT history.id, history.timestamp, history.type, history.data FROM history" + joins
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY history.timestamp DESC, history.id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count(self, query=None, qr_type=None):
+        joins, where, params = self._filters(query, qr_type)
+        sql = "SELECT COUNT(*) FROM history" + joins
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def find_by_payload(self, data):
+        """Entries with exactly this payload, newest first"""
+        rows = self.conn.execute(
+            "SELECT id, timestamp, type, data FROM history WHERE data_hash = ? "
+            "ORDER BY timestamp DESC, id DESC", (payload_hash(data),))
+        return [dict(row) for row in rows]
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM history")
+            if self.has_fts:
+                self.conn.execute("INSERT INTO history_fts (history_fts) VALUES ('delete-all')")
+
+    def migrate_json(self, json_path):
+        """Import the old qr_history.json once; returns the number of rows imported"""
+        done = self.conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            items = []
+
+        rows = [(item["data"], item.get("type", "text"), item.get("timestamp"))
+                for item in reversed(items) if isinstance(item, dict) and "data" in item]
+        # rows and flag in one transaction: a crash in between must not import twice
+        with self.conn:
+            self._insert_many(rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                              (datetime.now().isoformat(),))
+        return len(rows)
@@ -0,0 +1,106 @@
+"""Non-blocking logging and console output.
+
+Log records are put on a queue by a ``QueueHandler`` and written to the
+rotating log file (and stdout) by a ``QueueListener`` thread, so a batch loop
+never waits on disk. ``ConsoleBuffer`` replaces ``sys.stdout`` in the GUI: any
+thread may write to it, and the Tk side drains it a few times a second
+instead of touching the Text widget on every ``print``.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from collections import deque
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+CONSOLE_MAX_LINES = 2000
+
+_listener = None
+
+
+def setup_logging(path='qr_generator.log', level=logging.INFO, stream=None,
+                  max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """Route the root logger through a queue to a rotating file and ``stream``.
+
+    ``path=None`` skips the file; ``stream`` defaults to the real stdout. Safe
+    to call more than once: the previous listener is stopped first.
+    """
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if path:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'))
+    handlers.append(logging.StreamHandler(stream or sys.__stdout__))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class ConsoleBuffer:
+    """Thread-safe, bounded stand-in for ``sys.stdout``.
+
+    Complete lines are kept in a deque of at most ``max_lines``; when output
+    arrives faster than it is drained the oldest lines are dropped and
+    counted rather than growing without bound.
+    """
+
+    def __init__(self, max_lines=CONSOLE_MAX_LINES):
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ""
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def write(self, message):
+        with self.lock:
+            pieces = (self.partial + message).split("\n")
+            self.partial = pieces.pop()
+            overflow = len(self.lines) + len(pieces) - self.lines.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self.lines.extend(pieces)
+        return len(message)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Everything written since the last drain, and how many lines were dropped"""
+        with self.lock:
+            if not self.lines and not self.partial:
+                return "", 0
+            text = "".join(line + "\n" for line in self.lines) + self.partial
+            dropped = self.dropped
+            self.lines.clear()
+            self.partial = ""
+            self.dropped = 0
+        return text, dropped
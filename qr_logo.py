@@ -0,0 +1,91 @@
+"""Decoded logo assets for the overlay path.
+
+A logo file is decoded once per modification time; the resized RGBA copy and
+its circular mask are cached per target pixel size, so rendering thousands of
+codes with the same logo does not reopen or resize the file each time.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps, ImageDraw
+
+
+def logo_pixels(img_size, logo_size):
+    """Edge length of the logo box for an image of ``img_size`` and a percentage"""
+    return min(img_size) * logo_size // 100
+
+
+class LogoAssets:
+    """LRU of decoded logos and their resized, masked variants"""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.sources = OrderedDict()
+        self.variants = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remember(self, table, key, value):
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > self.max_entries:
+            table.popitem(last=False)
+
+    def source(self, path):
+        """Decoded logo image, reloaded when the file's mtime changes"""
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            cached = self.sources.get(path)
+            if cached is not None and cached[0] == mtime:
+                self.sources.move_to_end(path)
+                return mtime, cached[1]
+
+        logo = Image.open(path)
+        logo.load()
+        with self.lock:
+            self._remember(self.sources, path, (mtime, logo))
+        return mtime, logo
+
+    def get(self, path, size):
+        """Resized RGBA logo and circular mask fitting a ``size`` x ``size`` box"""
+        mtime, source = self.source(path)
+        key = (os.path.abspath(path), mtime, size)
+        with self.lock:
+            cached = self.variants.get(key)
+            if cached is not None:
+                self.variants.move_to_end(key)
+                return cached
+
+        logo = ImageOps.contain(source, (size, size)).convert("RGBA")
+        mask = Image.new('L', logo.size, 0)
+        draw = ImageDraw.Draw(mask)
+        draw.ellipse((0, 0, logo.size[0], logo.size[1]), fill=255)
+
+        with self.lock:
+            self._remember(self.variants, key, (logo, mask))
+        return logo, mask
+
+    def overlay(self, img, path, logo_size):
+        """Paste the circular logo in the middle of ``img`` (in place)"""
+        logo, mask = self.get(path, logo_pixels(img.size, logo_size))
+        pos = ((img.size[0] - logo.size[0]) // 2, (img.size[1] - logo.size[1]) // 2)
+        img.paste(logo, pos, mask=mask)
+        return img
+
+    def overlay_many(self, images, path, logo_size):
+        """Paste the logo onto every image, resizing once per distinct image size"""
+        for img in images:
+            self.overlay(img, path, logo_size)
+        return images
+
+
+_default_assets = None
+
+
+def default_assets():
+    """The process-wide logo cache, created on first use"""
+    global _default_assets
+    if _default_assets is None:
+        _default_assets = LogoAssets()
+    return _default_assets
@@ -0,0 +1,197 @@
+"""Per-stage timing histograms.
+
+Hot paths wrap each stage in ``timed("encode")`` and friends. While metrics
+are disabled (the default outside the GUI) that returns a shared no-op
+context manager, so the hooks cost one global lookup and a call. When
+enabled, durations go into fixed-bucket histograms that can be read as a
+dict, exported as JSON or as Prometheus text, and merged across processes
+(batch workers send theirs back with each chunk).
+
+    import qr_metrics
+    qr_metrics.enable()
+    render_bytes("https://example.com")
+    print(qr_metrics.to_prometheus())
+"""
+import json
+import threading
+from contextlib import nullcontext
+from time import perf_counter
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+STAGES = ("payload", "encode", "rasterize", "logo", "save", "write", "verify", "thumbnail", "history")
+
+_NULL = nullcontext()
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+
+
+class Histogram:
+    """Count, sum, extremes and bucket counts for one stage"""
+    __slots__ = ("count", "total", "low", "high", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.low = float("inf")
+        self.high = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.low = min(self.low, seconds)
+        self.high = max(self.high, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q):
+        """Estimate from the buckets (linear within a bucket, clamped to min/max)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(BUCKETS, self.buckets):
+            if count and seen + count >= rank:
+                upper = min(bound, self.high)
+                value = lower + (upper - lower) * (rank - seen) / count
+                return max(self.low, min(value, self.high))
+            seen += count
+            lower = bound
+        return self.high
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.low if self.count else 0.0,
+            "max": self.high,
+            "buckets": list(self.buckets),
+        }
+
+    def merge(self, other):
+        """Add a histogram in ``as_dict()`` form"""
+        self.count += other["count"]
+        self.total += other["sum"]
+        if other["count"]:
+            self.low = min(self.low, other["min"])
+            self.high = max(self.high, other["max"])
+        self.buckets = [a + b for a, b in zip(self.buckets, other["buckets"])]
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, perf_counter() - self.start)
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def timed(stage):
+    """Context manager timing one stage; a no-op while metrics are disabled"""
+    if not _enabled:
+        return _NULL
+    return _Timer(stage)
+
+
+def observe(stage, seconds):
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def snapshot():
+    """``{stage: histogram dict}`` in STAGES order, then any other stages"""
+    with _lock:
+        order = [s for s in STAGES if s in _histograms] + sorted(set(_histograms) - set(STAGES))
+        return {stage: _histograms[stage].as_dict() for stage in order}
+
+
+def drain():
+    """Snapshot and reset, or None while disabled; used by batch workers"""
+    if not _enabled:
+        return None
+    with _lock:
+        taken = {stage: histogram.as_dict() for stage, histogram in _histograms.items()}
+        _histograms.clear()
+    return taken
+
+
+def merge(stages):
+    """Fold a ``snapshot()``/``drain()`` from another process into this one"""
+    if not stages:
+        return
+    with _lock:
+        for stage, values in stages.items():
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                histogram = _histograms[stage] = Histogram()
+            histogram.merge(values)
+
+
+def summary():
+    """One line per stage: count, mean, p50, p95 and max in milliseconds"""
+    with _lock:
+        rows = [(stage, _histograms[stage]) for stage in STAGES if stage in _histograms]
+        rows += [(stage, _histograms[stage]) for stage in sorted(set(_histograms) - set(STAGES))]
+        return [
+            f"{stage:<10} {h.count:7d}  mean {h.total / h.count * 1000:8.2f} ms  "
+            f"p50 {h.quantile(0.5) * 1000:8.2f} ms  p95 {h.quantile(0.95) * 1000:8.2f} ms  "
+            f"max {h.high * 1000:8.2f} ms"
+            for stage, h in rows
+        ]
+
+
+def to_json(indent=2):
+    return json.dumps({"buckets": [str(b) for b in BUCKETS], "stages": snapshot()}, indent=indent)
+
+
+def to_prometheus(name="nmqr_stage_seconds"):
+    """Prometheus text exposition format, one histogram labelled by stage"""
+    lines = [f"# HELP {name} Time spent per QR generation stage.", f"# TYPE {name} histogram"]
+    for stage, values in snapshot().items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS, values["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {values["sum"]!r}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {values["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    """Write the metrics to ``path``: Prometheus text for .prom/.txt, JSON otherwise"""
+    text = to_prometheus() if path.lower().endswith((".prom", ".txt")) else to_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
@@ -0,0 +1,88 @@
+"""Payload builders shared by the GUI, batch and headless paths"""
+import json
+import re
+
+from qr_templates import TEMPLATE_FIELDS, PayloadTemplate, compile_template
+
+
+# Inputs the Debug tab's "Test Domain Detection" button runs through detect_input_type()
+DOMAIN_TEST_INPUTS = ["playerkomona.top", "google.com", "test.org", "ac.ke", "example.com"]
+
+# All of detect_input_type()'s checks in one pattern, tried in the same order:
+# bare domain, http(s) URL, www. prefix, email, phone number, @handle.
+# Only the domain and email checks ignore case.
+_INPUT_TYPES = re.compile(r"""
+      (?P<domain>(?i:[a-zA-Z0-9][a-zA-Z0-9.-]*\.[a-zA-Z]{2,})$)
+    | (?P<url>https?://)
+    | (?P<www>www\.)
+    | (?P<email>(?i:[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})$)
+    | (?P<phone>[+]?[0-9\s\-()]{10,}$)
+    | (?P<handle>@)
+""", re.VERBOSE)
+_PHONE_SEPARATORS = re.compile(r"[\s\-()]")
+
+
+def detect_input_type(user_input):
+    """Guess what kind of content the user typed and normalise it"""
+    user_input = user_input.strip()
+    match = _INPUT_TYPES.match(user_input)
+    kind = match.lastgroup if match else None
+
+    if kind == "domain" or kind == "www":
+        return f"https://{user_input}", "website"
+    if kind == "url":
+        return user_input, "website"
+    if kind == "email":
+        return f"mailto:{user_input}", "email"
+    if kind == "phone":
+        clean_phone = _PHONE_SEPARATORS.sub("", user_input)
+        if len(clean_phone) >= 10:
+            return f"tel:{clean_phone}", "phone"
+    elif kind == "handle":
+        return f"https://instagram.com/{user_input[1:]}", "social media"
+
+    return user_input, "text"
+
+
+def classify_many(inputs):
+    """detect_input_type() for every string in ``inputs``, as a list"""
+    return list(map(detect_input_type, inputs))
+
+
+def text_fields(fields):
+    """``fields`` with string values, as a CSV row has them: ``123`` and ``true`` as spelled in JSON, None as empty"""
+    return {key: value if isinstance(value, str) else "" if value is None else json.dumps(value)
+            for key, value in fields.items()}
+
+
+def wifi_payload(ssid, password, security="", hidden=False):
+    """Build a WiFi network payload ("" security = WPA with a password, else open)"""
+    row = {"ssid": ssid, "password": password, "security": security, "hidden": "true" if hidden else ""}
+    return compile_template(PayloadTemplate("wifi"))(row)
+
+
+def vcard_payload(name, phone, email, version="3.0"):
+    """Build a vCard contact payload"""
+    return compile_template(PayloadTemplate("vcard", version=version))({"name": name, "phone": phone, "email": email})
+
+
+def build_payload(fields, qr_type=None, template=None):
+    """Build the payload for one row of fields (``data``, ``ssid``, ``name``, ...).
+
+    The row's own ``type`` wins over ``qr_type``. WiFi and vCard rows go
+    through ``template`` (see qr_templates) when it is of their kind, else read
+    the columns named after their fields; without a type the ``data`` field
+    goes through detect_input_type() like the Generator tab does.
+    """
+    qr_type = (fields.get("type") or qr_type or "auto").strip().lower()
+    if template is not None and template.kind == qr_type:
+        return compile_template(template)(fields), qr_type
+    if qr_type in TEMPLATE_FIELDS:
+        return compile_template(PayloadTemplate(qr_type))(fields), qr_type
+
+    data = (fields.get("data") or "").strip()
+    if not data:
+        raise ValueError("Empty item")
+    if qr_type == "text":
+        return data, "text"
+    return detect_input_type(data)
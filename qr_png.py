@@ -0,0 +1,125 @@
+"""Compact raster output.
+
+A QR code has two colors, yet a plain ``img.save()`` of the rendered RGB
+image writes 24 bits per pixel. ``encode_image()`` gives every format the
+smallest image mode that loses nothing:
+
+    PNG    1-bit grayscale for black on white, a 2-entry (1-bit) palette for
+           other colors, and once a logo adds colors an exact palette of up
+           to 256 entries, with a transparency chunk when the background is
+           transparent; truecolor only when the logo needs more colors
+    WEBP   lossless RGB, or RGBA when the background is transparent
+    JPEG   RGB at quality 95, flattened onto white
+
+``COMPRESSION`` trades PNG encode time for size: zlib level 1, 8, or 9
+plus the optimize pass. The default is above Pillow's 6 because at level 6
+the long rows of 8-bit palette images (codes with a logo) often compress
+worse than RGB, while at one byte per pixel level 8 is still cheaper than
+RGB at 6.
+"""
+import io
+
+from PIL import Image, ImageChops
+
+from qr_raster import numpy_module
+
+COMPRESSION = {
+    "fast": {"compress_level": 1},
+    "default": {"compress_level": 8},
+    "small": {"compress_level": 9, "optimize": True},
+}
+
+# Lossless WebP keeps module edges exact and is smaller than PNG for QR codes
+SAVE_OPTIONS = {"WEBP": {"lossless": True}, "JPEG": {"quality": 95}}
+
+_BLACK_ON_WHITE = ([255, 255, 255, 0, 0, 0], [0, 0, 0, 255, 255, 255])
+
+
+def has_alpha(img):
+    return img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+
+
+def _to_palette(img, colors):
+    """``img`` (RGB) as a palette image of exactly ``colors`` (sorted), or None"""
+    np = numpy_module()
+    if np is not None:
+        pixels = np.asarray(img, dtype=np.uint32)
+        keys = (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+        table = np.array([(r << 16) | (g << 8) | b for r, g, b in colors], dtype=np.uint32)
+        index = np.searchsorted(table, keys).astype(np.uint8)
+        reduced = Image.frombuffer("P", img.size, index.tobytes(), "raw", "P", 0, 1)
+        reduced.putpalette([channel for color in colors for channel in color])
+        return reduced
+
+    # with no more colors than it may use, median cut keeps every color as is;
+    # checked anyway, since a wrong module color would be worse than a big file
+    reduced = img.quantize(colors=len(colors), method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    if ImageChops.difference(reduced.convert("RGB"), img).getbbox() is not None:
+        return None
+    palette = reduced.getpalette()
+    order = [tuple(palette[i:i + 3]) for i in range(0, len(palette), 3)]
+    return reduced.remap_palette([order.index(color) for color in colors])
+
+
+def reduce(img):
+    """``img`` in the smallest lossless PNG mode: "1", "P" or, failing that, unchanged.
+
+    A palette result keeps its transparent index in ``info["transparency"]``.
+    """
+    if img.mode == "P" and not has_alpha(img):
+        if img.getpalette() in _BLACK_ON_WHITE:
+            return img.convert("1", dither=Image.Dither.NONE)
+        return img
+    if img.mode not in ("RGB", "RGBA"):
+        return img
+    counts = img.getcolors(256)
+    if counts is None:
+        return img  # a photo logo: keep truecolor
+
+    colors = sorted(color for _, color in counts)
+    transparent = None
+    if img.mode == "RGBA":
+        if any(0 < color[3] < 255 for color in colors):
+            return img  # soft edges need the alpha channel
+        opaque = sorted({color[:3] for color in colors if color[3] == 255})
+        if len(opaque) == len(colors):
+            img, colors = img.convert("RGB"), opaque
+        elif len(opaque) < 256:
+            # fully transparent pixels become one spare color, marked transparent
+            taken = set(opaque)
+            key = next((v, v, v) for v in range(256) if (v, v, v) not in taken)
+            flat = Image.new("RGB", img.size, key)
+            flat.paste(img, mask=img.getchannel("A"))
+            img, colors, transparent = flat, sorted(opaque + [key]), key
+        else:
+            return img
+
+    if transparent is None and colors in ([(0, 0, 0), (255, 255, 255)], [(0, 0, 0)], [(255, 255, 255)]):
+        return img.convert("1", dither=Image.Dither.NONE)
+    reduced = _to_palette(img, colors)
+    if reduced is None:
+        return img
+    if transparent is not None:
+        reduced.info["transparency"] = colors.index(transparent)
+    return reduced
+
+
+def encode_image(img, format="PNG", compression="default"):
+    """Encoded bytes of ``img`` in ``format``, in the smallest lossless mode the format allows"""
+    format = format.upper()
+    if format == "PNG":
+        img = reduce(img)
+        params = dict(COMPRESSION[compression])
+        if "transparency" in img.info:
+            params["transparency"] = img.info["transparency"]
+    else:
+        params = SAVE_OPTIONS.get(format, {})
+        if format == "JPEG" and has_alpha(img):
+            flat = Image.new("RGB", img.size, "white")
+            flat.paste(img.convert("RGBA"), mask=img.convert("RGBA").getchannel("A"))
+            img = flat
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if has_alpha(img) else "RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format=format, **params)
+    return buffer.getvalue()
@@ -0,0 +1,197 @@
+"""Encode profiles: the cheapest error-correction level, version and mode split.
+
+The GUI always used ERROR_CORRECT_H, which is only needed when a logo hides
+part of the symbol. ``choose_profile()`` picks the lowest level at which
+the logo leaves every Reed-Solomon block repairable, the split of the
+payload into numeric/alphanumeric/byte segments that needs the fewest bits,
+and the smallest version those fit in.
+
+The logo check counts codewords, not area: every module the logo touches
+spoils the whole codeword it belongs to, and a block corrects at most half
+its error-correction codewords less the misdecode reserve of versions 1-3.
+The logo may use up to ``DAMAGE_LIMIT`` of that, leaving the rest for
+scanning damage.
+It only depends on the version, level, border and logo size, so it is
+worked out once per combination from qr_encode's placement order and block
+tables, without building a matrix per candidate.
+"""
+import functools
+import math
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional
+
+from qrcode import util
+from qrcode.exceptions import DataOverflowError
+
+from qr_encode import MISDECODE_CODEWORDS, default_encoder
+from qr_render import ERROR_LEVELS
+
+LEVELS = "LMQH"
+
+# Minimum run lengths tried when splitting the payload into segments
+SPLIT_MINIMUMS = (3, 6, 12, 20)
+
+# Versions sharing the same character-count field widths
+VERSION_CLASSES = ((1, 9), (10, 26), (27, 40))
+
+# Share of a block's correction the logo may use. The rest is headroom for
+# print defects, glare and blur, which spoil codewords the logo leaves alone
+DAMAGE_LIMIT = 0.75
+
+MODE_NAMES = {util.MODE_NUMBER: "numeric", util.MODE_ALPHA_NUM: "alnum", util.MODE_8BIT_BYTE: "byte"}
+
+
+@dataclass
+class EncodeProfile:
+    level: str
+    version: int
+    segments: list
+    data_bits: int
+    coverage: float  # share of the symbol's area under the logo
+    damage: float  # worst block's spoiled codewords over what it can correct; above 1 won't scan
+    baseline_version: Optional[int]  # what a plain EC H encode needs; None if it overflows
+
+    @property
+    def modules(self):
+        return 17 + 4 * self.version
+
+    @property
+    def modules_saved(self):
+        if self.baseline_version is None:
+            return None
+        return (17 + 4 * self.baseline_version) ** 2 - self.modules ** 2
+
+    def report(self):
+        modes = ", ".join(f"{MODE_NAMES[s.mode]}:{len(s)}" for s in self.segments)
+        summary = (f"EC {self.level}, version {self.version} ({self.modules}x{self.modules}), "
+                   f"segments [{modes}], logo covers {self.coverage:.0%} "
+                   f"using {self.damage:.0%} of the correction; ")
+        if self.baseline_version is None:
+            return summary + "too long for EC H"
+        if self.modules_saved < 0:
+            return summary + f"{-self.modules_saved} more modules than EC H version {self.baseline_version} " \
+                             "to fit the logo"
+        return summary + f"{self.modules_saved} modules saved vs EC H version {self.baseline_version}"
+
+
+def segment_bits(segment, version):
+    """Bits a segment takes at ``version``, header included"""
+    count = len(segment)
+    if segment.mode == util.MODE_NUMBER:
+        body = 10 * (count // 3) + util.NUMBER_LENGTH.get(count % 3, 0)
+    elif segment.mode == util.MODE_ALPHA_NUM:
+        body = 11 * (count // 2) + 6 * (count % 2)
+    else:
+        body = 8 * count
+    return 4 + util.length_in_bits(segment.mode, version) + body
+
+
+def fit_version(segments, level):
+    """Smallest version holding ``segments`` at ``level`` and the bits used, or (None, None)"""
+    limits = util.BIT_LIMIT_TABLE[ERROR_LEVELS[level]]
+    for low, high in VERSION_CLASSES:
+        bits = sum(segment_bits(segment, low) for segment in segments)
+        version = bisect_left(limits, bits, low, high + 1)
+        if version <= high:
+            return version, bits
+    return None, None
+
+
+def split_candidates(data):
+    """Different ways of cutting ``data`` into mode segments"""
+    candidates = [[util.QRData(data)]]
+    for minimum in SPLIT_MINIMUMS:
+        candidates.append(list(util.optimal_data_chunks(data, minimum=minimum)))
+    return candidates
+
+
+def best_split(candidates, level):
+    best = None
+    for segments in candidates:
+        version, bits = fit_version(segments, level)
+        if version is not None and (best is None or (version, bits) < best[:2]):
+            best = (version, bits, segments)
+    return best
+
+
+def logo_coverage(version, options):
+    """Share of the symbol hidden by the circular logo"""
+    if not options.logo_path:
+        return 0.0
+    modules = 17 + 4 * version
+    side = (modules + 2 * options.border) * options.logo_size / 100
+    return math.pi / 4 * (side / modules) ** 2
+
+
+def _hidden_cells(size, border, logo_size):
+    """Indexes (row * size + col) of the modules the centred circular logo touches"""
+    radius = (size + 2 * border) * logo_size / 200
+    centre = size / 2
+    hidden = set()
+    for row in range(size):
+        dy = max(abs(row + 0.5 - centre) - 0.5, 0)
+        for col in range(size):
+            dx = max(abs(col + 0.5 - centre) - 0.5, 0)
+            if dx * dx + dy * dy < radius * radius:
+                hidden.add(row * size + col)
+    return hidden
+
+
+@functools.lru_cache(maxsize=1024)
+def codeword_damage(version, level, border, logo_size):
+    """Spoiled codewords over correctable errors for the logo's worst block (inf if it hides a finder)"""
+    size = 17 + 4 * version
+    hidden = _hidden_cells(size, border, logo_size)
+    finders = ((0, 0), (0, size - 7), (size - 7, 0))
+    if any((top + 3) * size + left + 3 in hidden for top, left in finders):
+        return math.inf  # not even the finder patterns survive; no level helps
+
+    encoder = default_encoder()
+    blocks = encoder.blocks(version, level)
+    # block of each codeword in the interleaved stream: data codewords, then EC codewords
+    owners = [b for i in range(max(d for d, _ in blocks)) for b, (d, _) in enumerate(blocks) if i < d]
+    owners += [b for i in range(max(e for _, e in blocks)) for b, (_, e) in enumerate(blocks) if i < e]
+    spoiled = [set() for _ in blocks]
+    for position, cell in enumerate(encoder.layout(version).data_cells):
+        codeword = position // 8
+        if codeword < len(owners) and cell in hidden:
+            spoiled[owners[codeword]].add(codeword)
+
+    reserved = MISDECODE_CODEWORDS.get((version, level), 0)
+    return max(len(codewords) / ((ec_count - reserved) // 2)
+               for codewords, (_, ec_count) in zip(spoiled, blocks))
+
+
+def choose_profile(data, options, min_level="L", damage_limit=DAMAGE_LIMIT):
+    """Cheapest profile whose error correction survives the logo with ``damage_limit`` to spare"""
+    candidates = split_candidates(data)
+    baseline = fit_version(list(util.optimal_data_chunks(data, minimum=20)), "H")[0]
+
+    chosen = None
+    for level in LEVELS[LEVELS.index(min_level):]:
+        best = best_split(candidates, level)
+        if best is None:
+            continue
+        version, bits, segments = best
+        if options.logo_path:
+            damage = codeword_damage(version, level, options.border, options.logo_size)
+        else:
+            damage = 0.0
+        chosen = EncodeProfile(level, version, segments, bits, logo_coverage(version, options), damage, baseline)
+        if damage <= damage_limit:
+            return chosen
+
+    if chosen is None:
+        raise DataOverflowError()
+
+    # not even H survives the logo at the smallest version: a larger symbol
+    # spreads it over more blocks (and has no misdecode reserve past version 3)
+    limits = util.BIT_LIMIT_TABLE[ERROR_LEVELS[chosen.level]]
+    for version in range(chosen.version + 1, 41):
+        bits = sum(segment_bits(segment, version) for segment in chosen.segments)
+        damage = codeword_damage(version, chosen.level, options.border, options.logo_size)
+        if damage <= damage_limit and bits <= limits[version]:
+            return EncodeProfile(chosen.level, version, chosen.segments, bits, logo_coverage(version, options),
+                                 damage, baseline)
+    return chosen
@@ -0,0 +1,62 @@
+"""Matrix-to-image rasterizer.
+
+qrcode's PIL drawer paints every dark module as a separate rectangle and the
+result is then converted to RGB in a second pass. Here the boolean module
+matrix is expanded to pixels in one step (NumPy block expansion when NumPy is
+installed, a nearest-neighbour resize in C otherwise) and the two colors are
+applied through a palette, which is pixel-identical to the drawer's output.
+"""
+from PIL import Image, ImageColor
+
+# NumPy is optional and slow to import, so it is loaded on first use.
+# None = not tried yet, False = not installed.
+np = None
+
+
+def numpy_module():
+    """The numpy module, or None when it isn't installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = False
+    return np or None
+
+
+def parse_color(color):
+    """RGB tuple for a color name, hex string or tuple"""
+    if isinstance(color, str):
+        return ImageColor.getrgb(color)[:3]
+    return tuple(color)[:3]
+
+
+def expand(matrix, box_size):
+    """Palette-index image (0 = light, 1 = dark) with every module scaled to ``box_size`` pixels"""
+    size = len(matrix)
+    np = numpy_module()
+    if np is not None:
+        modules = np.asarray(matrix, dtype=np.uint8)
+        pixels = modules.repeat(box_size, axis=0).repeat(box_size, axis=1)
+        return Image.frombuffer("P", (pixels.shape[1], pixels.shape[0]), pixels.tobytes(), "raw", "P", 0, 1)
+
+    img = Image.frombytes("P", (size, size), bytes(1 if dark else 0 for row in matrix for dark in row))
+    return img.resize((size * box_size, size * box_size), Image.Resampling.NEAREST)
+
+
+def rasterize(matrix, box_size, fg_color="black", bg_color="white", mode="RGB"):
+    """Build the final image for a module matrix (border included).
+
+    ``mode`` is "RGB", "P" (two-entry palette) or "1" (black on white).
+    """
+    img = expand(matrix, box_size)
+
+    if mode == "1":
+        img.putpalette((255, 255, 255, 0, 0, 0))
+        return img.convert("1", dither=Image.Dither.NONE)
+
+    img.putpalette(parse_color(bg_color) + parse_color(fg_color))
+    if mode == "P":
+        return img
+    return img.convert(mode)
@@ -0,0 +1,142 @@
+"""Headless QR rendering core.
+
+Nothing in this module imports tkinter, so it can be used on servers without
+a display and inside worker processes. The GUI and the batch paths are thin
+layers on top of ``render()``.
+"""
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H
+from PIL import Image
+
+from qr_logo import default_assets
+from qr_metrics import timed
+from qr_png import encode_image
+from qr_raster import rasterize
+
+logger = logging.getLogger(__name__)
+
+ERROR_LEVELS = {
+    "L": ERROR_CORRECT_L,
+    "M": ERROR_CORRECT_M,
+    "Q": ERROR_CORRECT_Q,
+    "H": ERROR_CORRECT_H,
+}
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """Everything besides the payload that affects the rendered image"""
+    fg_color: str = "black"
+    bg_color: str = "white"
+    logo_path: Optional[str] = None
+    logo_size: int = 25
+    error_correction: str = "H"  # L, M, Q, H or "auto" (see qr_profile)
+    box_size: int = 10
+    border: int = 4
+    compression: str = "default"  # PNG effort: fast, default or small (see qr_png)
+
+
+def build_qr(data, options):
+    """Build and fit the QR matrix for ``data``"""
+    with timed("encode"):
+        return _build_qr(data, options)
+
+
+def _build_qr(data, options):
+    if options.error_correction == "auto":
+        from qr_profile import choose_profile
+
+        profile = choose_profile(data, options)
+        qr = qrcode.QRCode(
+            version=profile.version,
+            error_correction=ERROR_LEVELS[profile.level],
+            box_size=options.box_size,
+            border=options.border,
+        )
+        for segment in profile.segments:
+            qr.add_data(segment)
+        qr.make(fit=False)
+        return qr
+
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=ERROR_LEVELS[options.error_correction],
+        box_size=options.box_size,
+        border=options.border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def draw(qr, options, mode="RGB"):
+    """Turn a fitted QR matrix into a PIL image.
+
+    ``mode="P"`` keeps a plain two-color code as a 2-entry palette image,
+    which is all the encoders need; codes with a logo are always RGB. A
+    transparent background gives an RGBA image either way.
+    """
+    if options.logo_path:
+        mode = "RGB"
+    with timed("rasterize"):
+        try:
+            img = rasterize(qr.get_matrix(), options.box_size, options.fg_color, options.bg_color, mode)
+        except ValueError:
+            # Colors PIL can't parse on its own (e.g. "transparent") go through qrcode's drawer
+            qr.box_size = options.box_size
+            img = qr.make_image(fill_color=options.fg_color, back_color=options.bg_color)
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA") else "RGB")
+
+    if options.logo_path:
+        with timed("logo"):
+            try:
+                default_assets().overlay(img, options.logo_path, options.logo_size)
+            except Exception as e:
+                logger.warning("Logo error: %s", e)
+
+    return img
+
+
+def render(data, options=None):
+    """Render ``data`` to an RGB PIL image"""
+    options = options or RenderOptions()
+    return draw(build_qr(data, options), options)
+
+
+def render_preview(data, options=None, max_size=350):
+    """Render ``data`` at the largest whole box size that fits in ``max_size`` pixels"""
+    options = options or RenderOptions()
+    qr = build_qr(data, options)
+    box_size = max(1, max_size // (qr.modules_count + 2 * options.border))
+    return draw(qr, replace(options, box_size=box_size))
+
+
+def format_for_path(path, default="PNG"):
+    """Output format name for a filename's extension"""
+    from qr_vector import VECTOR_FORMATS
+
+    ext = os.path.splitext(path)[1].lower()
+    for name, vector_ext in VECTOR_FORMATS.items():
+        if ext == vector_ext:
+            return name
+    return Image.registered_extensions().get(ext, default)
+
+
+def render_bytes(data, options=None, format="PNG"):
+    """Render ``data`` and return the encoded image bytes (raster or vector)"""
+    from qr_vector import VECTOR_FORMATS, vector_bytes
+
+    options = options or RenderOptions()
+    if format.upper() in VECTOR_FORMATS:
+        qr = build_qr(data, options)
+        with timed("save"):
+            return vector_bytes(qr, options, format)
+
+    img = draw(build_qr(data, options), options, mode="P")
+    with timed("save"):
+        return encode_image(img, format, options.compression)
@@ -0,0 +1,308 @@
+"""Memory-bounded batch pipeline: reader -> render pool -> writer.
+
+``run_jobs()`` on its own keeps a fixed number of chunks in flight, and its
+caller writes each result before asking for the next. That is fine for loose
+files, but once results carry image bytes (archives, fan-out) a slow writer
+or large images make memory depend on the input.
+
+``BatchScheduler`` runs the three stages on separate threads, joined by
+bounded queues:
+
+    reader   pulls jobs from the (lazy) input into a queue of a few chunks;
+             it blocks when rendering falls behind
+    render   the qr_batch process pool; chunks in flight are limited so that
+             their expected result bytes fit in half the memory budget
+    writer   calls ``sink(result)`` for every result; while it is behind,
+             results that don't fit in the other half of the budget are
+             spilled to a temporary file and read back in turn
+
+so peak memory follows the budget, not the number of items.
+
+    scheduler = BatchScheduler(workers=4, memory_budget=128 * 2 ** 20)
+    stats = scheduler.run(jobs, writer.add)
+    print(stats.memory_report())
+"""
+import os
+import pickle
+import queue
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+import qr_cache
+from qr_batch import run_jobs
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+_DONE = object()
+
+
+def result_bytes(result):
+    """Image bytes a BatchResult is carrying"""
+    size = len(result.data or b"")
+    for _, _, data in result.outputs or ():
+        size += len(data or b"")
+    return size
+
+
+def format_bytes(size):
+    if size < 1024:
+        return f"{size:.0f} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 2 ** 20:.1f} MB"
+
+
+def peak_rss():
+    """Peak resident set size in MB of this process and of its largest worker, or None"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes on macOS, KB elsewhere
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+class Spool:
+    """FIFO of results parked in a temporary file"""
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self.file = None
+        self.read_at = self.write_at = 0
+        self.count = 0
+        self.total = 0  # results ever spilled
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def put(self, result):
+        with self.lock:
+            if self.file is None:
+                self.file = tempfile.TemporaryFile(prefix="qr_spool_", dir=self.folder)
+            self.file.seek(self.write_at)
+            pickle.dump(result, self.file, pickle.HIGHEST_PROTOCOL)
+            self.write_at = self.file.tell()
+            self.count += 1
+            self.total += 1
+
+    def get(self):
+        """Oldest spilled result, or None when the spool is empty"""
+        with self.lock:
+            if not self.count:
+                return None
+            self.file.seek(self.read_at)
+            result = pickle.load(self.file)
+            self.read_at = self.file.tell()
+            self.count -= 1
+            if not self.count:
+                # everything has been read back: start over at the top of the file
+                self.file.seek(0)
+                self.file.truncate()
+                self.read_at = self.write_at = 0
+            return result
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+@dataclass
+class BatchStats:
+    done: int = 0
+    failed: int = 0
+    spilled: int = 0
+    peak_held: int = 0  # largest amount of result bytes queued for the writer
+    peak_rss: Optional[dict] = field(default=None)
+    output_bytes: int = 0
+    render_ms: float = 0.0
+    verified: int = 0
+    unreadable: int = 0
+
+    def add(self, result):
+        if result.ok:
+            self.done += 1
+            self.output_bytes += result.size
+            self.render_ms += result.ms
+        else:
+            self.failed += 1
+        if result.verified is not None:
+            self.verified += 1
+            self.unreadable += not result.verified
+
+    def output_report(self):
+        """Average file size and worker time per generated item"""
+        if not self.done:
+            return "nothing generated"
+        return (f"{format_bytes(self.output_bytes / self.done)} and {self.render_ms / self.done:.1f} ms per item, "
+                f"{format_bytes(self.output_bytes)} in total")
+
+    def verify_report(self):
+        """Decode check summary, or "" when nothing was verified"""
+        if not self.verified:
+            return ""
+        return f"Verified {self.verified} codes by decoding them: {self.unreadable} unreadable"
+
+    def memory_report(self):
+        """Peak RSS and spilling, for the end-of-batch summary"""
+        parts = []
+        if self.peak_rss:
+            parts.append(f"Peak RSS {self.peak_rss['main']:.0f} MB main, "
+                         f"{self.peak_rss['workers']:.0f} MB largest worker")
+        parts.append(f"{self.peak_held / 2 ** 20:.1f} MB max queued for the writer")
+        if self.spilled:
+            parts.append(f"{self.spilled} results spilled to disk while the writer caught up")
+        return "; ".join(parts)
+
+
+class BatchScheduler:
+    """Runs jobs through reader, render and writer stages within a memory budget"""
+
+    def __init__(self, workers=None, chunk_size=16, memory_budget=DEFAULT_MEMORY_BUDGET, spool_dir=None,
+                 cache_bytes=qr_cache.DEFAULT_MAX_BYTES, cache_dir=None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.spool_dir = spool_dir
+        self.cache = {"cache_bytes": cache_bytes, "cache_dir": cache_dir}
+
+        self.lock = threading.Lock()
+        self.held = 0
+        self.seen = 0
+        self.seen_bytes = 0
+        self.error = None
+
+    def max_pending(self):
+        """Two chunks per worker, fewer if their expected results don't fit in half the budget"""
+        with self.lock:
+            average = self.seen_bytes / self.seen if self.seen else 0
+        most = 2 * self.workers
+        if not average:
+            return most
+        return max(1, min(most, int(self.memory_budget / 2 // (average * self.chunk_size))))
+
+    def run(self, jobs, sink):
+        """Render ``jobs`` and hand every result to ``sink`` on the writer thread"""
+        self.workers = self.workers or os.cpu_count() or 1
+        self.stopping = threading.Event()
+        stats = BatchStats()
+        jobs_queue = queue.Queue(maxsize=self.chunk_size * 2)
+        results = queue.Queue(maxsize=self.chunk_size * self.workers * 2)
+        spool = Spool(self.spool_dir)
+
+        reader = threading.Thread(target=self.read, args=(jobs, jobs_queue), name="batch-reader", daemon=True)
+        writer = threading.Thread(target=self.write, args=(results, spool, sink, stats), name="batch-writer",
+                                  daemon=True)
+        reader.start()
+        writer.start()
+        try:
+            for result in run_jobs(self.take(jobs_queue), workers=self.workers, chunk_size=self.chunk_size,
+                                   max_pending=self.max_pending, **self.cache):
+                if self.error is not None:
+                    break
+                self.offer(result, results, spool, stats)
+        finally:
+            self.stopping.set()
+            while writer.is_alive():
+                try:
+                    results.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            writer.join()
+            spool.close()
+        if self.error is not None:
+            raise self.error
+        stats.spilled = spool.total
+        stats.peak_rss = peak_rss()
+        return stats
+
+    def read(self, jobs, jobs_queue):
+        try:
+            for job in jobs:
+                if not self.put(jobs_queue, job):
+                    return
+        except Exception as e:
+            self.error = e
+        self.put(jobs_queue, _DONE)
+
+    def put(self, target, item):
+        """Blocking put that gives up once the run is over"""
+        while not self.stopping.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def take(self, jobs_queue):
+        while True:
+            job = jobs_queue.get()
+            if job is _DONE:
+                return
+            yield job
+
+    def offer(self, result, results, spool, stats):
+        """Queue a result for the writer, or spill it when the writer is behind"""
+        size = result_bytes(result)
+        with self.lock:
+            self.seen += 1
+            self.seen_bytes += size
+            fits = not spool and self.held + size <= self.memory_budget / 2
+            if fits:
+                try:
+                    results.put_nowait((result, size))
+                except queue.Full:
+                    fits = False
+                else:
+                    self.held += size
+                    stats.peak_held = max(stats.peak_held, self.held)
+        if not fits:
+            # once anything is spilled, later results follow it to disk until
+            # the writer has read the spool back, so they stay in order
+            spool.put(result)
+            try:
+                results.put_nowait(None)  # wake the writer if it is waiting
+            except queue.Full:
+                pass
+
+    def write(self, results, spool, sink, stats):
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                item = spool.get()
+                if item is None:
+                    item = results.get()
+                else:
+                    item = (item, 0)
+            if item is _DONE:
+                break
+            if item is None:
+                continue
+            result, size = item
+            with self.lock:
+                self.held -= size
+            if not self.handle(result, sink, stats):
+                return
+
+        while len(spool):
+            if not self.handle(spool.get(), sink, stats):
+                return
+
+    def handle(self, result, sink, stats):
+        try:
+            stats.add(result)
+            sink(result)
+            return True
+        except Exception as e:
+            self.error = e
+            return False
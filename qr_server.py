@@ -0,0 +1,287 @@
+"""Local HTTP rendering service: ``python nmqr.py serve``
+
+    GET  /render?data=...        one image; other fields as in the batch CLI
+                                 (type, fg, bg, ec, box, border, format,
+                                 compression, logo=1, and the WiFi/vCard
+                                 fields of qr_templates: ssid, password,
+                                 security, hidden, name, phone, email, ...);
+                                 box x (177 + 2 x border) is capped at
+                                 MAX_IMAGE_SIDE pixels
+    POST /bulk                   JSONL or a JSON array of the same fields;
+                                 streams back one JSON line per item
+    GET  /health
+
+Responses carry a strong ETag derived from the render parameters, so clients
+can revalidate with If-None-Match and get a 304 without any rendering.
+Connections are kept alive (HTTP/1.1) and rendering runs on a pool of worker
+processes that are started and warmed up before the first request.
+"""
+import base64
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from qr_cache import RenderCache, cache_key
+from qr_payloads import build_payload, text_fields
+from qr_png import COMPRESSION
+from qr_render import ERROR_LEVELS, RenderOptions, render_bytes
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "svg": ("SVG", "image/svg+xml"),
+    "pdf": ("PDF", "application/pdf"),
+    "eps": ("EPS", "application/postscript"),
+}
+
+MAX_BULK_ITEMS = 10000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# The version is only known once the payload is encoded, so image size is
+# checked against the largest symbol (version 40, 177 modules) up front
+MAX_IMAGE_SIDE = 8192
+MAX_MODULES = 177
+
+
+class RequestError(ValueError):
+    pass
+
+
+def _warm_up(_=None):
+    """Runs once in each worker so the first real request doesn't pay for imports"""
+    render_bytes("warm-up")
+    return os.getpid()
+
+
+def _whole_number(fields, key, default, minimum):
+    value = fields.get(key)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RequestError(f"'{key}' must be a whole number, not '{value}'")
+    if number < minimum:
+        raise RequestError(f"'{key}' must be at least {minimum}")
+    return number
+
+
+def parse_request(fields, defaults, logo_path=None):
+    """Turn request fields into ``(payload, options, format name, content type)``"""
+    fields = text_fields(fields)
+    try:
+        data, input_type = build_payload(fields)
+    except ValueError as e:
+        raise RequestError(str(e))
+
+    fmt = str(fields.get("format") or "png").lower()
+    if fmt not in FORMATS:
+        raise RequestError(f"Unsupported format '{fmt}'")
+
+    ec = str(fields.get("ec") or defaults.error_correction)
+    if ec != "auto" and ec not in ERROR_LEVELS:
+        raise RequestError(f"Unknown error correction level '{ec}'")
+
+    compression = str(fields.get("compression") or defaults.compression)
+    if compression not in COMPRESSION:
+        raise RequestError(f"Unknown compression '{compression}' (use {', '.join(COMPRESSION)})")
+
+    box_size = min(_whole_number(fields, "box", defaults.box_size, 1), 100)
+    border = min(_whole_number(fields, "border", defaults.border, 0), 20)
+    logo_size = min(max(_whole_number(fields, "logo_size", defaults.logo_size, 1), 10), 40)
+    side = box_size * (MAX_MODULES + 2 * border)
+    if side > MAX_IMAGE_SIDE:
+        raise RequestError(f"box {box_size} with border {border} allows {side}px images "
+                           f"(at most {MAX_IMAGE_SIDE}px)")
+
+    options = replace(
+        defaults,
+        fg_color=str(fields.get("fg") or defaults.fg_color),
+        bg_color=str(fields.get("bg") or defaults.bg_color),
+        error_correction=ec,
+        compression=compression,
+        box_size=box_size,
+        border=border,
+        logo_size=logo_size,
+        logo_path=logo_path if str(fields.get("logo", "")) in ("1", "true") else None,
+    )
+
+    return data, options, *FORMATS[fmt]
+
+
+class RenderService:
+    """Shared state behind the request handlers: worker pool and response cache"""
+
+    def __init__(self, workers=None, defaults=None, logo_path=None, cache_bytes=64 * 1024 * 1024):
+        self.defaults = defaults or RenderOptions()
+        self.logo_path = logo_path
+        self.cache = RenderCache(cache_bytes)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        pids = set(self.pool.map(_warm_up, range(self.workers * 2)))
+        logger.info("Started %d render workers", len(pids))
+
+    def close(self):
+        self.pool.shutdown()
+
+    def submit(self, data, options, fmt):
+        """Cached bytes for a render, or a future from the worker pool"""
+        body = self.cache.get(cache_key(data, options, fmt))
+        if body is not None:
+            return body
+        return self.pool.submit(render_bytes, data, options, fmt)
+
+    def result(self, key, job):
+        """Wait for a submitted render and remember it"""
+        if isinstance(job, bytes):
+            return job
+        body = job.result()
+        self.cache.put(key, body)
+        return body
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "nmqr"
+    disable_nagle_algorithm = True
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def send_json(self, status, payload, close=False):
+        """Send a JSON reply; ``close`` ends the connection, for replies sent
+        before the request body was read (it would be parsed as the next request)"""
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            return self.send_json(HTTPStatus.OK, {"status": "ok", "workers": self.service.workers,
+                                                  "cache": self.service.cache.stats()})
+        if url.path != "/render":
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+        fields = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            data, options, fmt, content_type = parse_request(fields, self.service.defaults,
+                                                             self.service.logo_path)
+        except RequestError as e:
+            return self.send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+
+        key = cache_key(data, options, fmt)
+        etag = f'"{key}"'
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            body = self.service.result(key, self.service.submit(data, options, fmt))
+        except Exception as e:
+            return self.send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": str(e)})
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "public, max-age=86400")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_bulk_items(self, length):
+        body = self.rfile.read(length).decode("utf-8")
+        if body.lstrip().startswith("["):
+            items = json.loads(body)
+        else:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        if len(items) > MAX_BULK_ITEMS:
+            raise RequestError(f"At most {MAX_BULK_ITEMS} items per request")
+        return [item if isinstance(item, dict) else {"data": str(item)} for item in items]
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/bulk":
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"}, close=True)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self.send_json(HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"}, close=True)
+        if length > MAX_BODY_BYTES:
+            return self.send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                  {"error": f"Request body over {MAX_BODY_BYTES} bytes"}, close=True)
+        try:
+            items = self.read_bulk_items(length)
+        except (RequestError, ValueError) as e:
+            return self.send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        # Submit everything up front so the pool stays busy, then stream in order
+        jobs = []
+        for index, fields in enumerate(items):
+            try:
+                data, options, fmt, _ = parse_request(fields, self.service.defaults, self.service.logo_path)
+                jobs.append((index, cache_key(data, options, fmt), fmt, self.service.submit(data, options, fmt)))
+            except Exception as e:
+                # the 200 is already sent: a bad item becomes an error line, never a cut-off stream
+                jobs.append((index, None, None, e))
+
+        for index, key, fmt, job in jobs:
+            if isinstance(job, Exception):
+                line = {"index": index, "error": str(job)}
+            else:
+                try:
+                    body = self.service.result(key, job)
+                    line = {"index": index, "etag": f'"{key}"', "format": fmt.lower(),
+                            "data": base64.b64encode(body).decode("ascii")}
+                except Exception as e:
+                    line = {"index": index, "error": str(e)}
+            self.write_chunk(json.dumps(line).encode("utf-8") + b"\n")
+        self.write_chunk(b"")
+
+
+def serve(host="127.0.0.1", port=8000, workers=None, defaults=None, logo_path=None):
+    """Run the service until interrupted"""
+    service = RenderService(workers, defaults, logo_path)
+    httpd = ThreadingHTTPServer((host, port), RenderHandler)
+    httpd.daemon_threads = True
+    httpd.service = service
+    print(f"Serving QR codes on http://{host}:{httpd.server_port}/render "
+          f"with {service.workers} workers", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
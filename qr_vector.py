@@ -0,0 +1,214 @@
+"""Vector output (SVG, PDF, EPS) built straight from the module matrix.
+
+Dark modules are merged into rectangles before anything is written: runs of
+adjacent modules in a row become one rectangle, and identical runs in
+consecutive rows are stacked into a taller one. That keeps print files small
+no matter how large the code is printed. One pixel of the raster output
+corresponds to one user unit (SVG) or one point (PDF/EPS).
+"""
+import base64
+import io
+import logging
+import zlib
+
+from qr_logo import default_assets, logo_pixels
+from qr_raster import parse_color
+
+logger = logging.getLogger(__name__)
+
+VECTOR_FORMATS = {"SVG": ".svg", "PDF": ".pdf", "EPS": ".eps"}
+
+
+def rectangles(matrix):
+    """Merge dark modules into ``(x, y, width, height)`` rectangles in module units"""
+    open_rects = {}
+    for y, row in enumerate(matrix):
+        runs = []
+        x = 0
+        width = len(row)
+        while x < width:
+            if row[x]:
+                start = x
+                while x < width and row[x]:
+                    x += 1
+                runs.append((start, x - start))
+            else:
+                x += 1
+
+        still_open = {}
+        for run in runs:
+            top = open_rects.pop(run, y)
+            still_open[run] = top
+        for (x0, length), top in open_rects.items():
+            yield x0, top, length, y - top
+        open_rects = still_open
+
+    for (x0, length), top in open_rects.items():
+        yield x0, top, length, len(matrix) - top
+
+
+def is_transparent(color):
+    return isinstance(color, str) and color.lower() == "transparent"
+
+
+def contain_size(size, box):
+    """Size ImageOps.contain() gives an image of ``size`` in a ``box`` x ``box`` square"""
+    width, height = size
+    if width > height:
+        return box, round(height / width * box)
+    if width < height:
+        return round(width / height * box), box
+    return box, box
+
+
+def logo_placement(pixel_size, logo_path, logo_size):
+    """Logo image at no more than its own resolution, and the box it is drawn in.
+
+    The circular crop is done with a vector clip path, so the logo never has
+    to be upscaled to print resolution.
+    """
+    _, source = default_assets().source(logo_path)
+    target = logo_pixels((pixel_size, pixel_size), logo_size)
+    width, height = contain_size(source.size, target)
+    if target >= max(source.size):
+        logo = source.convert("RGB")
+    else:
+        logo = default_assets().get(logo_path, target)[0].convert("RGB")
+    left, top = (pixel_size - width) // 2, (pixel_size - height) // 2
+    return logo, (left, top, width, height)
+
+
+def to_svg(matrix, box_size=10, fg_color="black", bg_color="white", logo_path=None, logo_size=25):
+    size = len(matrix)
+    pixels = size * box_size
+    fg = "#%02x%02x%02x" % parse_color(fg_color)
+    path = "".join(f"M{x} {y}h{w}v{h}h-{w}z" for x, y, w, h in rectangles(matrix))
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{pixels}" height="{pixels}" viewBox="0 0 {pixels} {pixels}">\n',
+    ]
+    if not is_transparent(bg_color):
+        bg = "#%02x%02x%02x" % parse_color(bg_color)
+        parts.append(f'<rect width="{pixels}" height="{pixels}" fill="{bg}"/>\n')
+    parts.append(f'<path transform="scale({box_size})" fill="{fg}" shape-rendering="crispEdges" d="{path}"/>\n')
+
+    if logo_path:
+        logo, (left, top, width, height) = logo_placement(pixels, logo_path, logo_size)
+        buffer = io.BytesIO()
+        logo.save(buffer, format="PNG")
+        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+        parts.append(f'<clipPath id="logo-clip"><ellipse cx="{left + width / 2}" cy="{top + height / 2}" '
+                     f'rx="{width / 2}" ry="{height / 2}"/></clipPath>\n')
+        parts.append(f'<image x="{left}" y="{top}" width="{width}" height="{height}" '
+                     f'preserveAspectRatio="none" clip-path="url(#logo-clip)" '
+                     f'xlink:href="data:image/png;base64,{encoded}"/>\n')
+
+    parts.append('</svg>\n')
+    return "".join(parts).encode("utf-8")
+
+
+def _pdf_color(color):
+    return " ".join(f"{c / 255:.4g}" for c in parse_color(color))
+
+
+def _pdf_rects(matrix, box_size, pixels):
+    """PDF ``re`` operators; PDF's origin is bottom-left, so rows are flipped"""
+    return "\n".join(
+        f"{x * box_size} {pixels - (y + h) * box_size} {w * box_size} {h * box_size} re"
+        for x, y, w, h in rectangles(matrix)
+    )
+
+
+def _pdf_ellipse(cx, cy, rx, ry):
+    """Ellipse path from four Bezier curves"""
+    k = 0.5523
+    return (f"{cx + rx} {cy} m "
+            f"{cx + rx} {cy + k * ry} {cx + k * rx} {cy + ry} {cx} {cy + ry} c "
+            f"{cx - k * rx} {cy + ry} {cx - rx} {cy + k * ry} {cx - rx} {cy} c "
+            f"{cx - rx} {cy - k * ry} {cx - k * rx} {cy - ry} {cx} {cy - ry} c "
+            f"{cx + k * rx} {cy - ry} {cx + rx} {cy - k * ry} {cx + rx} {cy} c")
+
+
+def _pdf_stream(header, data):
+    data = zlib.compress(data)
+    return (f"<< {header} /Filter /FlateDecode /Length {len(data)} >>\nstream\n").encode("ascii") + data + b"\nendstream"
+
+
+def to_pdf(matrix, box_size=10, fg_color="black", bg_color="white", logo_path=None, logo_size=25):
+    pixels = len(matrix) * box_size
+    content = []
+    if not is_transparent(bg_color):
+        content.append(f"{_pdf_color(bg_color)} rg 0 0 {pixels} {pixels} re f")
+    content.append(f"{_pdf_color(fg_color)} rg\n{_pdf_rects(matrix, box_size, pixels)}\nf")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        None,  # page, filled in below once the resources are known
+    ]
+    resources = ""
+    if logo_path:
+        logo, (left, top, width, height) = logo_placement(pixels, logo_path, logo_size)
+        objects.append(_pdf_stream(
+            f"/Type /XObject /Subtype /Image /Width {logo.size[0]} /Height {logo.size[1]} "
+            f"/BitsPerComponent 8 /ColorSpace /DeviceRGB", logo.tobytes()))
+        resources = f"/XObject << /Logo {len(objects)} 0 R >>"
+        bottom = pixels - top - height
+        clip = _pdf_ellipse(left + width / 2, bottom + height / 2, width / 2, height / 2)
+        content.append(f"q {clip} W n {width} 0 0 {height} {left} {bottom} cm /Logo Do Q")
+
+    objects.append(_pdf_stream("", "\n".join(content).encode("ascii")))
+    objects[2] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {pixels} {pixels}] "
+                  f"/Resources << {resources} >> /Contents {len(objects)} 0 R >>").encode("ascii")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+    return out.getvalue()
+
+
+def to_eps(matrix, box_size=10, fg_color="black", bg_color="white", logo_path=None, logo_size=25):
+    """Encapsulated PostScript; the logo overlay is not supported here"""
+    pixels = len(matrix) * box_size
+    lines = [
+        "%!PS-Adobe-3.0 EPSF-3.0",
+        f"%%BoundingBox: 0 0 {pixels} {pixels}",
+        "%%EndComments",
+    ]
+    if not is_transparent(bg_color):
+        lines.append(f"{_pdf_color(bg_color)} setrgbcolor 0 0 {pixels} {pixels} rectfill")
+    lines.append(f"{_pdf_color(fg_color)} setrgbcolor")
+    lines.extend(
+        f"{x * box_size} {pixels - (y + h) * box_size} {w * box_size} {h * box_size} rectfill"
+        for x, y, w, h in rectangles(matrix)
+    )
+    lines.extend(["showpage", "%%EOF", ""])
+    return "\n".join(lines).encode("ascii")
+
+
+WRITERS = {"SVG": to_svg, "PDF": to_pdf, "EPS": to_eps}
+
+
+def vector_bytes(qr, options, format):
+    """Encode a fitted QR code in one of the VECTOR_FORMATS"""
+    logo_path = options.logo_path
+    if logo_path:
+        try:
+            default_assets().source(logo_path)
+        except Exception as e:
+            logger.warning("Logo error: %s", e)
+            logo_path = None
+    return WRITERS[format.upper()](
+        qr.get_matrix(), options.box_size, options.fg_color, options.bg_color,
+        logo_path, options.logo_size,
+    )